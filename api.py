@@ -0,0 +1,148 @@
+import json
+from datetime import datetime
+
+from flask import Response, current_app, request
+
+from base import db
+from artist import Artist
+from pagination import keyset_page
+from show import Show
+from venue import Venue
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+VENUE_FIELDS = {name: getattr(Venue, name) for name in Venue.__table__.columns.keys()}
+ARTIST_FIELDS = {
+    name: getattr(Artist, name) for name in Artist.__table__.columns.keys()
+}
+SHOW_FIELDS = {
+    "id": Show.id,
+    "start_time": Show.start_time,
+    "venue_id": Show.venue_id,
+    "venue_name": Venue.name.label("venue_name"),
+    "venue_image_link": Venue.image_link.label("venue_image_link"),
+    "artist_id": Show.artist_id,
+    "artist_name": Artist.name.label("artist_name"),
+    "artist_image_link": Artist.image_link.label("artist_image_link"),
+}
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":"), default=_default)
+
+
+def _json(payload, status=200):
+    return Response(dumps(payload), status=status, mimetype="application/json")
+
+
+def _fields(available):
+    # sparse fieldsets: ?fields=id,name
+    requested = request.args.get("fields")
+    if not requested:
+        return list(available)
+    fields = [name.strip() for name in requested.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+
+def _query(available, fields, *extra):
+    columns = [available[name] for name in fields]
+    columns += [column for column in extra if not any(column is c for c in columns)]
+    query = db.session.query(*columns)
+    if available is SHOW_FIELDS:
+        query = query.select_from(Show)
+        if any(name.startswith("venue_") and name != "venue_id" for name in fields):
+            query = query.join(Venue, Show.venue_id == Venue.id)
+        if any(name.startswith("artist_") and name != "artist_id" for name in fields):
+            query = query.join(Artist, Show.artist_id == Artist.id)
+    return query
+
+
+def _list(available, order_columns, *criteria):
+    try:
+        fields = _fields(available)
+        limit = request.args.get("limit", current_app.config["API_PAGE_SIZE"], type=int)
+        limit = max(1, min(limit, current_app.config["API_MAX_PAGE_SIZE"]))
+        query = _query(available, fields, *order_columns).filter(*criteria)
+        rows, next_cursor = keyset_page(
+            query, order_columns, request.args.get("cursor"), limit
+        )
+    except ValueError as e:
+        return _json({"error": str(e)}, 400)
+    return _json(
+        {
+            "data": [{name: getattr(row, name) for name in fields} for row in rows],
+            "next": next_cursor,
+        }
+    )
+
+
+def _detail(available, *criteria):
+    try:
+        fields = _fields(available)
+    except ValueError as e:
+        return _json({"error": str(e)}, 400)
+    row = _query(available, fields).filter(*criteria).first()
+    if row is None:
+        return _json({"error": "Not found"}, 404)
+    return _json({"data": {name: getattr(row, name) for name in fields}})
+
+
+def api_venues():
+    return _list(VENUE_FIELDS, [Venue.id])
+
+
+def api_venue(venue_id):
+    return _detail(VENUE_FIELDS, Venue.id == venue_id)
+
+
+def api_artists():
+    return _list(ARTIST_FIELDS, [Artist.id])
+
+
+def api_artist(artist_id):
+    return _detail(ARTIST_FIELDS, Artist.id == artist_id)
+
+
+def api_shows():
+    # ?venue_id= / ?artist_id= use the (fk, start_time) indexes, ?since= the keyset one
+    criteria = []
+    venue_id = request.args.get("venue_id", type=int)
+    if venue_id is not None:
+        criteria.append(Show.venue_id == venue_id)
+    artist_id = request.args.get("artist_id", type=int)
+    if artist_id is not None:
+        criteria.append(Show.artist_id == artist_id)
+    since = request.args.get("since")
+    if since:
+        try:
+            criteria.append(Show.start_time >= datetime.fromisoformat(since))
+        except ValueError as e:
+            return _json({"error": str(e)}, 400)
+    return _list(SHOW_FIELDS, [Show.start_time, Show.id], *criteria)
+
+
+def api_show(show_id):
+    return _detail(SHOW_FIELDS, Show.id == show_id)
+
+
+def init_app(app):
+    app.add_url_rule("/api/v1/venues", view_func=api_venues)
+    app.add_url_rule("/api/v1/venues/<int:venue_id>", view_func=api_venue)
+    app.add_url_rule("/api/v1/artists", view_func=api_artists)
+    app.add_url_rule("/api/v1/artists/<int:artist_id>", view_func=api_artist)
+    app.add_url_rule("/api/v1/shows", view_func=api_shows)
+    app.add_url_rule("/api/v1/shows/<int:show_id>", view_func=api_show)
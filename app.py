@@ -3,18 +3,47 @@
 # ----------------------------------------------------------------------------#
 
 import json
-import dateutil.parser
-import babel
-from flask import Flask, render_template, request, Response, flash, redirect, url_for
+from datetime import datetime, timezone
+from functools import lru_cache
+from itertools import groupby
+from operator import attrgetter
+import click
+from flask import (
+    Flask,
+    current_app,
+    render_template,
+    request,
+    Response,
+    flash,
+    redirect,
+    url_for,
+    abort,
+    g,
+    jsonify,
+    stream_with_context,
+)
 import logging
 from logging import Formatter, FileHandler
-from flask_wtf import Form
-from forms import *
-from flask_migrate import Migrate
-from base import app, db
+from sqlalchemy import REAL, cast, func, insert, literal, select, true, tuple_
+from werkzeug.local import LocalProxy
+from base import db, moment
 from artist import Artist
 from venue import Venue
 from show import Show
+from version import Version
+from conditional import conditional
+from cache import PayloadCache
+from pagination import keyset_page
+import counters
+import instrumentation
+import replicas
+from replicas import reads_primary
+import metrics
+import commands
+import export
+import api
+import assets
+import fragments
 
 # ----------------------------------------------------------------------------#
 # App Config.
@@ -23,7 +52,9 @@ from show import Show
 
 # TODO: connect to a local postgresql database
 
-migrate = Migrate(app, db)
+# each app built by create_app() has its own caches
+detail_cache = LocalProxy(lambda: current_app.extensions["detail_cache"])
+facet_cache = LocalProxy(lambda: current_app.extensions["facet_cache"])
 
 # ----------------------------------------------------------------------------#
 # Models.
@@ -38,23 +69,269 @@ migrate = Migrate(app, db)
 # ----------------------------------------------------------------------------#
 
 
-def format_datetime(value, format="medium"):
-    date = dateutil.parser.parse(value)
-    if format == "full":
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == "medium":
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format, locale="en")
+DATETIME_FORMATS = {
+    "full": "EEEE MMMM, d, y 'at' h:mma",
+    "medium": "EE MM, dd, y h:mma",
+}
 
 
-app.jinja_env.filters["datetime"] = format_datetime
+@lru_cache(maxsize=64)
+def datetime_pattern(format, locale):
+    # compiled pattern and parsed locale, shared by every call with this pair
+    import babel
+    from babel.dates import parse_pattern
+
+    return parse_pattern(DATETIME_FORMATS.get(format, format)), babel.Locale.parse(
+        locale
+    )
+
+
+def format_datetime(value, format="medium", locale="en"):
+    # views pass datetime objects; strings are still accepted and parsed
+    if isinstance(value, str):
+        import dateutil.parser
+
+        value = dateutil.parser.parse(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    pattern, locale = datetime_pattern(format, locale)
+    return pattern.apply(value, locale)
+
+
+# ----------------------------------------------------------------------------#
+# Queries.
+# ----------------------------------------------------------------------------#
+
+
+def upcoming_show_counts(model, *columns):
+    # counts are maintained by counters.py, no join against Show per request
+    return db.session.query(
+        model.id,
+        model.name,
+        *columns,
+        model.upcoming_shows_count.label("num_upcoming_shows"),
+    )
+
+
+def browse_filters(model):
+    # ?genre= (repeatable, ?match=any|all), ?city= and ?state= of the list pages
+    filters = {}
+    criteria = []
+    genres = request.args.getlist("genre")
+    if genres:
+        match = request.args.get("match", "any")
+        if match not in ("any", "all"):
+            abort(400)
+        filters.update(genre=genres, match=match)
+        # && and @> are both answered by the GIN index on genres; a plain
+        # list binds as varchar[], an ARRAY[] literal would be text[]
+        if match == "any":
+            criteria.append(model.genres.overlap(genres))
+        else:
+            criteria.append(model.genres.contains(genres))
+    for name in ("city", "state"):
+        value = request.args.get(name, "").strip()
+        if value:
+            filters[name] = value
+            criteria.append(getattr(model, name) == value)
+    return filters, criteria
+
+
+def genre_facets(model, filters, criteria):
+    # rows matching the filters per genre, one GROUP BY over unnest(genres);
+    # kept per filter set under the page version so ?cursor= pages reuse it
+    key = (model.__tablename__, repr(sorted(filters.items())))
+    version = g.get("page_version")
+    facets = facet_cache.get(key, version)
+    if facets is None:
+        facets = count_genres(model, criteria)
+        facet_cache.set(key, facets, version=version)
+    return facets
+
+
+def count_genres(model, criteria):
+    genre = func.unnest(model.genres).table_valued("genre").render_derived()
+    count = func.count().label("count")
+    return (
+        db.session.query(genre.c.genre, count)
+        .select_from(model)
+        .join(genre, true())
+        .filter(*criteria)
+        .group_by(genre.c.genre)
+        .order_by(count.desc(), genre.c.genre)
+        .all()
+    )
+
+
+def assemble_detail(model, rows):
+    # rows of Show.for_detail(); None when the entity does not exist
+    if not rows:
+        return None
+    payload = rows[0][0].__get__()
+    prefix = "artist" if model is Venue else "venue"
+    payload["past_shows"] = []
+    payload["upcoming_shows"] = []
+    rollover = None
+    for row in rows:
+        if row.start_time is None:
+            continue
+        shows = payload["past_shows"] if row.is_past else payload["upcoming_shows"]
+        if not row.is_past and rollover is None:
+            # rows are ordered by start_time, this is the next show to go past
+            rollover = row.start_time
+        shows.append(
+            {
+                f"{prefix}_id": row.other_id,
+                f"{prefix}_name": row.other_name,
+                f"{prefix}_image_link": row.other_image_link,
+                "start_time": row.start_time,
+            }
+        )
+    payload["past_shows_count"] = rows[0].past_shows_count
+    payload["upcoming_shows_count"] = rows[0].upcoming_shows_count
+    return payload, rollover
+
+
+def detail_payload(model, entity_id):
+    # entity, every show and both counts come back in a single statement
+    assembled = assemble_detail(
+        model, Show.for_detail(model, entity_id, datetime.now()).all()
+    )
+    if assembled is None:
+        abort(404)
+    return assembled
+
+
+def cached_detail(model, entity_id, version=None):
+    # without a version (flashes pending, unknown id) the cache is bypassed
+    key = (model.__tablename__, entity_id)
+    payload = detail_cache.get(key, version)
+    if payload is None:
+        payload, rollover = detail_payload(model, entity_id)
+        detail_cache.set(key, payload, rollover, version)
+    return payload
+
+
+def invalidate_details(model, entity_id):
+    # the entity's own page plus every page that lists it next to a show
+    if model is Venue:
+        other, own_key, other_key = Artist, Show.venue_id, Show.artist_id
+    else:
+        other, own_key, other_key = Venue, Show.artist_id, Show.venue_id
+    related = db.session.query(other_key).filter(own_key == entity_id).distinct()
+    detail_cache.invalidate(
+        (model.__tablename__, entity_id),
+        *((other.__tablename__, row[0]) for row in related),
+    )
+
+
+def passed_shows(*criteria):
+    # pages change whenever a show moves from upcoming to past
+    return (
+        select(func.max(Show.start_time))
+        .where(Show.start_time <= datetime.now(), *criteria)
+        .scalar_subquery()
+    )
+
+
+def page_version(*components):
+    # all of a page's validators come back as one row in one round trip
+    return select(*components)
+
+
+def entity_version(model, entity_id, *components):
+    # a primary key lookup; show writes change it too, counters.record_shows
+    # updates the venue and artist rows (and so updated_at) in their
+    # transaction. No row for unknown ids, so the view renders its 404
+    # without validators
+    return select(model.updated_at, *components).where(model.id == entity_id)
+
+
+def venues_modified():
+    return page_version(*Version.of("Venue", "Show"), passed_shows())
+
+
+def venue_modified(venue_id):
+    return entity_version(
+        Venue,
+        venue_id,
+        *Version.of("Artist"),
+        passed_shows(Show.venue_id == venue_id),
+    )
+
+
+def artists_modified():
+    return page_version(*Version.of("Artist"))
+
+
+def artist_modified(artist_id):
+    return entity_version(
+        Artist,
+        artist_id,
+        *Version.of("Venue"),
+        passed_shows(Show.artist_id == artist_id),
+    )
+
+
+def shows_modified():
+    return page_version(*Version.of("Show", "Venue", "Artist"))
+
+
+def edit_venue_modified(venue_id):
+    return entity_version(Venue, venue_id)
+
+
+def edit_artist_modified(artist_id):
+    return entity_version(Artist, artist_id)
+
+
+def search_by_name(model, search_term, cursor=None):
+    # the pg_trgm GiST index on name answers both the ILIKE and the nearest
+    # first ORDER BY name <-> term, so a page reads only the rows it returns.
+    # Paged with a (distance, id) cursor; <-> is a real, so the cursor's value
+    # goes back as one to compare equal
+    per_page = current_app.config["SEARCH_RESULTS_LIMIT"]
+    search_term = search_term.strip()
+    if len(search_term) < current_app.config["SEARCH_MIN_LENGTH"]:
+        # no trigrams to look up, it would rank the whole table
+        return {"count": 0, "more": None, "data": []}
+    distance = model.name.op("<->", return_type=REAL)(search_term)
+    query = (
+        upcoming_show_counts(model, distance.label("distance"))
+        .filter(model.name.ilike(f"%{search_term}%"))
+    )
+    if cursor:
+        try:
+            score, _, row_id = cursor.rpartition("_")
+            after = tuple_(cast(literal(float(score)), REAL), literal(int(row_id)))
+        except ValueError:
+            abort(400)
+        query = query.filter(tuple_(distance, model.id) > after)
+    rows = query.order_by(distance, model.id).limit(per_page + 1).all()
+
+    more = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        more = f"{rows[-1].distance!r}_{rows[-1].id}"
+    return {
+        "count": len(rows),
+        "more": more,
+        "data": [
+            {
+                "id": row.id,
+                "name": row.name,
+                "num_upcoming_shows": row.num_upcoming_shows,
+            }
+            for row in rows
+        ],
+    }
 
 # ----------------------------------------------------------------------------#
 # Controllers.
 # ----------------------------------------------------------------------------#
 
 
-@app.route("/")
+@conditional()
 def index():
     return render_template("pages/home.html")
 
@@ -63,114 +340,64 @@ def index():
 #  ----------------------------------------------------------------
 
 
-@app.route("/venues")
+@conditional(venues_modified)
 def venues():
     # TODO: replace with real venues data.
     #       num_upcoming_shows should be aggregated based on number of upcoming shows per venue.
-    data = Venue.query.all()
-    groups = {}
-
-    for venue in data:
-        key = (venue.city, venue.state)
-        if key not in groups:
-            groups[key] = []
-        groups[key].append(
-            {
-                "id": venue.id,
-                "name": venue.name,
-                "num_upcoming_shows": len(
-                    [show for show in venue.shows if show.start_time > datetime.now()]
-                ),
-            }
+    filters, criteria = browse_filters(Venue)
+    try:
+        rows, next_cursor = keyset_page(
+            upcoming_show_counts(
+                Venue, Venue.city, Venue.state, Venue.updated_at.label("version")
+            ).filter(*criteria),
+            [Venue.state, Venue.city, Venue.name, Venue.id],
+            request.args.get("cursor"),
+            current_app.config["VENUES_PER_PAGE"],
         )
-    data = []
-    for (city, state), venues in groups.items():
-        data.append({"city": city, "state": state, "venues": venues})
-    return render_template("pages/venues.html", areas=data)
+    except ValueError:
+        abort(400)
+    # rows come in area order from ix_Venue_state_city_name_id; an area cut by
+    # the page size carries on at the top of the next page
+    data = (
+        {
+            "city": city,
+            "state": state,
+            "venues": [
+                {
+                    "id": venue.id,
+                    "name": venue.name,
+                    "num_upcoming_shows": venue.num_upcoming_shows,
+                    "version": venue.version,
+                }
+                for venue in venues
+            ],
+        }
+        for (state, city), venues in groupby(rows, key=attrgetter("state", "city"))
+    )
+    return render_template(
+        "pages/venues.html",
+        areas=data,
+        next_cursor=next_cursor,
+        filters=filters,
+        facets=genre_facets(Venue, filters, criteria),
+    )
 
 
-@app.route("/venues/search", methods=["POST"])
 def search_venues():
     # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
     # seach for Hop should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
     search_term = request.form.get("search_term", "")
-    venues = Venue.query.filter(Venue.name.ilike(f"%{search_term}%")).all()
-    response = {
-        "count": len(venues),
-        "data": [
-            {
-                "id": venue.id,
-                "name": venue.name,
-                "num_upcoming_shows": len(
-                    [show for show in venue.shows if show.start_time > datetime.now()]
-                ),
-            }
-            for venue in venues
-        ],
-    }
+    response = search_by_name(Venue, search_term, request.form.get("cursor"))
     return render_template(
         "pages/search_venues.html", results=response, search_term=search_term
     )
 
 
-@app.route("/venues/<int:venue_id>")
+@conditional(venue_modified)
 def show_venue(venue_id):
     # shows the venue page with the given venue_id
-    # TODO: replace with real venue data from the venues table, using venue_id
-    current_time = datetime.now()
-    result: Venue = Venue.query.get(venue_id)
-    venue = result.__get__()
-    past_shows_query = (
-        db.session.query(
-            Show.start_time,
-            Artist.id.label("artist_id"),
-            Artist.name.label("artist_name"),
-            Artist.image_link.label("artist_image_link"),
-        )
-        .join(Artist, Show.artist_id == Artist.id)
-        .filter(Show.venue_id == venue_id, Show.start_time < current_time)
-        .all()
-    )
-
-    upcoming_shows_query = (
-        db.session.query(
-            Show.start_time,
-            Artist.id.label("artist_id"),
-            Artist.name.label("artist_name"),
-            Artist.image_link.label("artist_image_link"),
-        )
-        .join(Artist, Show.artist_id == Artist.id)
-        .filter(Show.venue_id == venue_id, Show.start_time >= current_time)
-        .all()
-    )
-
-    past_shows = [
-        {
-            "artist_id": show.artist_id,
-            "artist_name": show.artist_name,
-            "artist_image_link": show.artist_image_link,
-            "start_time": show.start_time.isoformat(),
-        }
-        for show in past_shows_query
-    ]
-
-    upcoming_shows = [
-        {
-            "artist_id": show.artist_id,
-            "artist_name": show.artist_name,
-            "artist_image_link": show.artist_image_link,
-            "start_time": show.start_time.isoformat(),
-        }
-        for show in upcoming_shows_query
-    ]
-
-    upcoming_shows_count = len(upcoming_shows)
-    past_shows_count = len(past_shows)
-    venue["upcoming_shows_count"] = upcoming_shows_count
-    venue["past_shows_count"] = past_shows_count
-    venue["past_shows"] = past_shows
-    venue["upcoming_shows"] = upcoming_shows
+    venue = cached_detail(Venue, venue_id, g.get("page_version"))
     return render_template("pages/show_venue.html", venue=venue)
 
 
@@ -178,14 +405,17 @@ def show_venue(venue_id):
 #  ----------------------------------------------------------------
 
 
-@app.route("/venues/create", methods=["GET"])
+@conditional()
 def create_venue_form():
+    from forms import VenueForm
+
     form = VenueForm()
     return render_template("forms/new_venue.html", form=form)
 
 
-@app.route("/venues/create", methods=["POST"])
 def create_venue_submission():
+    from forms import VenueForm
+
     form = VenueForm(request.form, meta={"csrf": False})
     if form.validate() is False:
         errors = ", ".join(
@@ -214,6 +444,7 @@ def create_venue_submission():
             seeking_description=request.form["seeking_description"],
         )
         db.session.add(new_venue)
+        Version.bump("Venue")
         db.session.commit()
         # on successful db insert, flash success
         flash("Venue " + request.form["name"] + " was successfully listed!")
@@ -232,15 +463,16 @@ def create_venue_submission():
     return render_template("pages/home.html")
 
 
-@app.route("/venues/<venue_id>", methods=["DELETE"])
 def delete_venue(venue_id):
     # TODO: Complete this endpoint for taking a venue_id, and using
     # SQLAlchemy ORM to delete a record. Handle cases where the session commit could fail.
     try:
         venue = Venue.query.get(venue_id)
+        invalidate_details(Venue, venue.id)
         db.session.delete(venue)
+        Version.bump("Venue")
         db.session.commit()
-        flash(f'Venue {venue["name"]} was successfully deleted!')
+        flash(f"Venue {venue.name} was successfully deleted!")
     except:
         db.session.rollback()
         flash(f"An error occurred. Venue could not be deleted.")
@@ -254,37 +486,40 @@ def delete_venue(venue_id):
 
 #  Artists
 #  ----------------------------------------------------------------
-@app.route("/artists")
+@conditional(artists_modified)
 def artists():
-    # TODO: replace with real data returned from querying the database
-    result = Artist.query.all()
-    data = []
-    for artist in result:
-        artist_data = {"id": artist.id, "name": artist.name}
-        data.append(artist_data)
-    return render_template("pages/artists.html", artists=data)
+    # only the columns the page renders, one keyset page at a time
+    filters, criteria = browse_filters(Artist)
+    try:
+        result, next_cursor = keyset_page(
+            db.session.query(
+                Artist.id, Artist.name, Artist.updated_at.label("version")
+            ).filter(*criteria),
+            [Artist.id],
+            request.args.get("cursor"),
+            current_app.config["ARTISTS_PER_PAGE"],
+        )
+    except ValueError:
+        abort(400)
+    data = [
+        {"id": artist.id, "name": artist.name, "version": artist.version}
+        for artist in result
+    ]
+    return render_template(
+        "pages/artists.html",
+        artists=data,
+        next_cursor=next_cursor,
+        filters=filters,
+        facets=genre_facets(Artist, filters, criteria),
+    )
 
 
-@app.route("/artists/search", methods=["POST"])
 def search_artists():
     # TODO: implement search on artists with partial string search. Ensure it is case-insensitive.
     # seach for "A" should return "Guns N Petals", "Matt Quevado", and "The Wild Sax Band".
     # search for "band" should return "The Wild Sax Band".
     search_term = request.form.get("search_term", "")
-    artists = Artist.query.filter(Artist.name.ilike(f"%{search_term}%")).all()
-    response = {
-        "count": len(artists),
-        "data": [
-            {
-                "id": artist.id,
-                "name": artist.name,
-                "num_upcoming_shows": len(
-                    [show for show in artist.shows if show.start_time > datetime.now()]
-                ),
-            }
-            for artist in artists
-        ],
-    }
+    response = search_by_name(Artist, search_term, request.form.get("cursor"))
     # response={
     #   "count": 1,
     #   "data": [{
@@ -298,81 +533,31 @@ def search_artists():
     )
 
 
-@app.route("/artists/<int:artist_id>")
+@conditional(artist_modified)
 def show_artist(artist_id):
-    current_time = datetime.now()
     # shows the artist page with the given artist_id
-    # TODO: replace with real artist data from the artist table, using artist_id
-    result: Artist = Artist.query.get(artist_id)
-    artist = result.__get__()
-
-    past_shows_query = (
-        db.session.query(
-            Show.start_time,
-            Venue.id.label("venue_id"),
-            Venue.name.label("venue_name"),
-            Venue.image_link.label("venue_image_link"),
-        )
-        .join(Venue, Show.venue_id == Venue.id)
-        .filter(Show.artist_id == artist_id, Show.start_time < current_time)
-        .all()
-    )
-
-    upcoming_shows_query = (
-        db.session.query(
-            Show.start_time,
-            Venue.id.label("venue_id"),
-            Venue.name.label("venue_name"),
-            Venue.image_link.label("venue_image_link"),
-        )
-        .join(Venue, Show.venue_id == Venue.id)
-        .filter(Show.artist_id == artist_id, Show.start_time >= current_time)
-        .all()
-    )
-
-    past_shows = [
-        {
-            "venue_id": show.venue_id,
-            "venue_name": show.venue_name,
-            "venue_image_link": show.venue_image_link,
-            "start_time": show.start_time.isoformat(),
-        }
-        for show in past_shows_query
-    ]
-
-    upcoming_shows = [
-        {
-            "venue_id": show.venue_id,
-            "venue_name": show.venue_name,
-            "venue_image_link": show.venue_image_link,
-            "start_time": show.start_time.isoformat(),
-        }
-        for show in upcoming_shows_query
-    ]
-
-    upcoming_shows_count = len(upcoming_shows)
-    past_shows_count = len(past_shows)
-    artist["upcoming_shows_count"] = upcoming_shows_count
-    artist["past_shows_count"] = past_shows_count
-    artist["past_shows"] = past_shows
-    artist["upcoming_shows"] = upcoming_shows
-
+    artist = cached_detail(Artist, artist_id, g.get("page_version"))
     return render_template("pages/show_artist.html", artist=artist)
 
 
 #  Update
 #  ----------------------------------------------------------------
-@app.route("/artists/<int:artist_id>/edit", methods=["GET"])
+@reads_primary
+@conditional(edit_artist_modified)
 def edit_artist(artist_id):
+    from forms import ArtistForm
+
     form = ArtistForm()
-    result: Artist = Artist.query.get(artist_id)
-    artist = result.__get__()
+    # the row alone, from the primary; not from detail_cache, it may hold a
+    # payload read from a lagging replica
+    artist = db.get_or_404(Artist, artist_id).__get__()
     # TODO: populate form with fields from artist with ID <artist_id>
     return render_template("forms/edit_artist.html", form=form, artist=artist)
 
 
-@app.route("/artists/<int:artist_id>/edit", methods=["POST"])
 def edit_artist_submission(artist_id):
+    from forms import ArtistForm
+
     artist: Artist = Artist.query.get(artist_id)
     form = ArtistForm(request.form, meta={"csrf": False})
     if form.validate() is False:
@@ -397,21 +582,28 @@ def edit_artist_submission(artist_id):
     artist.website_link = request.form["website_link"]
     artist.seeking_venue = request.form.get("seeking_venue", "n") == "y"
     artist.seeking_description = request.form["seeking_description"]
+    Version.bump("Artist")
     db.session.commit()
+    invalidate_details(Artist, artist_id)
     return redirect(url_for("show_artist", artist_id=artist_id))
 
 
-@app.route("/venues/<int:venue_id>/edit", methods=["GET"])
+@reads_primary
+@conditional(edit_venue_modified)
 def edit_venue(venue_id):
+    from forms import VenueForm
+
     form = VenueForm()
-    result: Venue = Venue.query.get(venue_id)
-    venue = result.__get__()
+    # the row alone, from the primary; not from detail_cache, it may hold a
+    # payload read from a lagging replica
+    venue = db.get_or_404(Venue, venue_id).__get__()
     # TODO: populate form with values from venue with ID <venue_id>
     return render_template("forms/edit_venue.html", form=form, venue=venue)
 
 
-@app.route("/venues/<int:venue_id>/edit", methods=["POST"])
 def edit_venue_submission(venue_id):
+    from forms import VenueForm
+
     venue: Venue = Venue.query.get(venue_id)
     form = VenueForm(request.form, meta={"csrf": False})
     if form.validate() is False:
@@ -437,7 +629,9 @@ def edit_venue_submission(venue_id):
     venue.website_link = request.form["website_link"]
     venue.seeking_talent = request.form.get("seeking_talent", "n") == "y"
     venue.seeking_description = request.form["seeking_description"]
+    Version.bump("Venue")
     db.session.commit()
+    invalidate_details(Venue, venue_id)
     return redirect(url_for("show_venue", venue_id=venue_id))
 
 
@@ -445,14 +639,17 @@ def edit_venue_submission(venue_id):
 #  ----------------------------------------------------------------
 
 
-@app.route("/artists/create", methods=["GET"])
+@conditional()
 def create_artist_form():
+    from forms import ArtistForm
+
     form = ArtistForm()
     return render_template("forms/new_artist.html", form=form)
 
 
-@app.route("/artists/create", methods=["POST"])
 def create_artist_submission():
+    from forms import ArtistForm
+
     form = ArtistForm(request.form, meta={"csrf": False})
     if form.validate() is False:
         errors = ", ".join(
@@ -481,6 +678,7 @@ def create_artist_submission():
             seeking_description=request.form["seeking_description"],
         )
         db.session.add(new_artist)
+        Version.bump("Artist")
         db.session.commit()
         # on successful db insert, flash success
         flash("Artist " + request.form["name"] + " was successfully listed!")
@@ -502,28 +700,51 @@ def create_artist_submission():
 #  ----------------------------------------------------------------
 
 
-@app.route("/shows")
+@conditional(shows_modified)
 def shows():
-    # displays list of shows at /shows
-    # TODO: replace with real venues data.
-    result = Show.query.all()
-    data = []
-    for show in result:
-        data.append(show.__get__())
-    return render_template("pages/shows.html", shows=data)
+    # displays list of shows at /shows, one keyset page of (start_time, id) at a time
+    try:
+        # a tile changes with its show, venue or artist; versions its fragment
+        version = func.greatest(Show.updated_at, Venue.updated_at, Artist.updated_at)
+        result, next_cursor = keyset_page(
+            Show.listing().add_columns(version.label("version")),
+            [Show.start_time, Show.id],
+            request.args.get("cursor"),
+            current_app.config["SHOWS_PER_PAGE"],
+        )
+    except ValueError:
+        abort(400)
+
+    data = [
+        {
+            "id": show.id,
+            "venue_id": show.venue_id,
+            "venue_name": show.venue_name,
+            "artist_id": show.artist_id,
+            "artist_name": show.artist_name,
+            "artist_image_link": show.artist_image_link,
+            "start_time": show.start_time,
+            "version": show.version,
+        }
+        for show in result
+    ]
+    return render_template("pages/shows.html", shows=data, next_cursor=next_cursor)
 
 
-@app.route("/shows/create")
+@conditional()
 def create_shows():
     # renders form. do not touch.
+    from forms import ShowForm
+
     form = ShowForm()
     return render_template("forms/new_show.html", form=form)
 
 
-@app.route("/shows/create", methods=["POST"])
 def create_show_submission():
     # called to create new shows in the db, upon submitting new show listing form
     # TODO: insert form data as a new Show record in the db, instead
+    from forms import ShowForm
+
     form = ShowForm(request.form, meta={"csrf": False})
     if form.validate() is False:
         errors = ", ".join(
@@ -536,12 +757,15 @@ def create_show_submission():
         flash(f"Please fix these errors: {errors}")
         return render_template("forms/new_show.html", form=form)
     try:
-        artist_id = request.form["artist_id"]
-        venue_id = request.form["venue_id"]
-        start_time = request.form["start_time"]
+        artist_id = int(request.form["artist_id"])
+        venue_id = int(request.form["venue_id"])
+        start_time = form.start_time.data
         show = Show(artist_id=artist_id, venue_id=venue_id, start_time=start_time)
         db.session.add(show)
+        counters.record_shows([(venue_id, artist_id, start_time)])
+        Version.bump("Show")
         db.session.commit()
+        detail_cache.invalidate(("Venue", venue_id), ("Artist", artist_id))
         # on successful db insert, flash success
         flash("Show was successfully listed!")
     except Exception as e:
@@ -554,25 +778,249 @@ def create_show_submission():
     return render_template("pages/home.html")
 
 
-@app.errorhandler(404)
+@conditional()
+def schedule_shows():
+    from forms import ShowScheduleForm
+
+    form = ShowScheduleForm()
+    return render_template("forms/schedule_shows.html", form=form)
+
+
+def schedule_shows_submission():
+    # a recurring show or a pasted list; every row is checked first and either
+    # all of them go in with one INSERT and one commit or none do
+    import importer
+    from forms import ShowForm, ShowScheduleForm
+
+    form = ShowScheduleForm(request.form, meta={"csrf": False})
+    if form.validate() is False:
+        errors = ", ".join(
+            [
+                f"{field} {error}"
+                for field, errs in form.errors.items()
+                for error in errs
+            ]
+        )
+        flash(f"Please fix these errors: {errors}")
+        return render_template("forms/schedule_shows.html", form=form)
+
+    field_types = importer.form_field_types(ShowForm)
+    batch, rejected = [], []
+    for label, row in form.rows():
+        values, errors = importer.validate("shows", row, field_types)
+        if errors:
+            rejected.append((label, errors))
+        else:
+            batch.append((label, row, values))
+    orphans = importer.missing_references(batch)
+    for label, _, _ in orphans:
+        rejected.append((label, {"artist_id/venue_id": ["No such id."]}))
+    if rejected:
+        total = len(rejected) + len(batch) - len(orphans)
+        flash(f"{len(rejected)} of {total} shows have errors, none were listed.")
+        return render_template(
+            "forms/schedule_shows.html", form=form, rejected=rejected
+        )
+
+    shows = [values for _, _, values in batch]
+    try:
+        db.session.execute(insert(Show).values(shows))
+        counters.record_shows(
+            (show["venue_id"], show["artist_id"], show["start_time"]) for show in shows
+        )
+        Version.bump("Show")
+        db.session.commit()
+        detail_cache.invalidate(
+            *{("Venue", show["venue_id"]) for show in shows},
+            *{("Artist", show["artist_id"]) for show in shows},
+        )
+        flash(f"{len(shows)} shows were successfully listed!")
+    except Exception:
+        db.session.rollback()
+        flash("An error occurred. The shows could not be listed.")
+    finally:
+        db.session.close()
+    return render_template("pages/home.html")
+
+
+#  Export
+#  ----------------------------------------------------------------
+
+
+def export_data(kind, fmt):
+    # streams the whole table, optionally only shows starting at or after ?since=
+    since = request.args.get("since")
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            abort(400)
+    return Response(
+        stream_with_context(export.stream(kind, fmt, since or None)),
+        mimetype=export.FORMATS[fmt],
+        headers={"Content-Disposition": f"attachment; filename={kind}.{fmt}"},
+    )
+
+
+#  Operations
+#  ----------------------------------------------------------------
+
+
+def cache_stats():
+    # keyed by the name /metrics labels each cache with
+    return {
+        "detail": detail_cache.stats(),
+        "fragment": current_app.jinja_env.fragment_cache.stats(),
+        "facet": facet_cache.stats(),
+    }
+
+
+def stats():
+    # live connection pool and cache statistics for operators
+    return jsonify(
+        pool=db.engine.pool.stats(),
+        detail_cache=detail_cache.stats(),
+        fragment_cache=current_app.jinja_env.fragment_cache.stats(),
+        facet_cache=facet_cache.stats(),
+    )
+
+
+def prometheus_metrics():
+    return Response(
+        metrics.render(
+            current_app.extensions["request_metrics"],
+            db.engine.pool.stats(),
+            cache_stats(),
+        ),
+        mimetype="text/plain; version=0.0.4",
+    )
+
+
 def not_found_error(error):
     return render_template("errors/404.html"), 404
 
 
-@app.errorhandler(500)
 def server_error(error):
     return render_template("errors/500.html"), 500
 
 
-if not app.debug:
-    file_handler = FileHandler("error.log")
-    file_handler.setFormatter(
-        Formatter("%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]")
+slow_query_handler = FileHandler("slow_queries.log", delay=True)
+slow_query_handler.setFormatter(Formatter("%(asctime)s %(message)s"))
+instrumentation.slow_query_logger.setLevel(logging.WARNING)
+instrumentation.slow_query_logger.addHandler(slow_query_handler)
+
+
+# ----------------------------------------------------------------------------#
+# App Factory.
+# ----------------------------------------------------------------------------#
+
+
+def create_app(config="config"):
+    """Build the Flask app with its extensions, caches, routes and commands.
+
+    Flask-Migrate pulls in Alembic, which is only needed by ``flask db``, so
+    it is registered when the app is loaded by the flask command and web
+    workers boot without it.
+    """
+    app = Flask(__name__)
+    app.config.from_object(config)
+    fragments.init_app(app)
+    db.init_app(app)
+    moment.init_app(app)
+    if click.get_current_context(silent=True) is not None:
+        from flask_migrate import Migrate
+
+        Migrate(app, db)
+    instrumentation.init_app(app)
+    replicas.init_app(app)
+    metrics.RequestMetrics().init_app(app)
+    commands.init_app(app)
+    api.init_app(app)
+    assets.init_app(app)
+    app.extensions["detail_cache"] = PayloadCache(
+        app.config["DETAIL_CACHE_SIZE"], app.config["DETAIL_CACHE_TTL"]
+    )
+    app.extensions["facet_cache"] = PayloadCache(
+        app.config["FACET_CACHE_SIZE"], app.config["FACET_CACHE_TTL"]
     )
-    app.logger.setLevel(logging.INFO)
-    file_handler.setLevel(logging.INFO)
-    app.logger.addHandler(file_handler)
-    app.logger.info("errors")
+    app.jinja_env.filters["datetime"] = format_datetime
+
+    app.add_url_rule("/", view_func=index)
+    app.add_url_rule("/venues", view_func=venues)
+    app.add_url_rule("/venues/search", view_func=search_venues, methods=["POST"])
+    app.add_url_rule("/venues/<int:venue_id>", view_func=show_venue)
+    app.add_url_rule("/venues/create", view_func=create_venue_form, methods=["GET"])
+    app.add_url_rule(
+        "/venues/create",
+        view_func=create_venue_submission,
+        methods=["POST"],
+    )
+    app.add_url_rule("/venues/<venue_id>", view_func=delete_venue, methods=["DELETE"])
+    app.add_url_rule("/artists", view_func=artists)
+    app.add_url_rule("/artists/search", view_func=search_artists, methods=["POST"])
+    app.add_url_rule("/artists/<int:artist_id>", view_func=show_artist)
+    app.add_url_rule(
+        "/artists/<int:artist_id>/edit",
+        view_func=edit_artist,
+        methods=["GET"],
+    )
+    app.add_url_rule(
+        "/artists/<int:artist_id>/edit",
+        view_func=edit_artist_submission,
+        methods=["POST"],
+    )
+    app.add_url_rule(
+        "/venues/<int:venue_id>/edit",
+        view_func=edit_venue,
+        methods=["GET"],
+    )
+    app.add_url_rule(
+        "/venues/<int:venue_id>/edit",
+        view_func=edit_venue_submission,
+        methods=["POST"],
+    )
+    app.add_url_rule("/artists/create", view_func=create_artist_form, methods=["GET"])
+    app.add_url_rule(
+        "/artists/create",
+        view_func=create_artist_submission,
+        methods=["POST"],
+    )
+    app.add_url_rule("/shows", view_func=shows)
+    app.add_url_rule("/shows/create", view_func=create_shows)
+    app.add_url_rule(
+        "/shows/create",
+        view_func=create_show_submission,
+        methods=["POST"],
+    )
+    app.add_url_rule("/shows/schedule", view_func=schedule_shows)
+    app.add_url_rule(
+        "/shows/schedule",
+        view_func=schedule_shows_submission,
+        methods=["POST"],
+    )
+    app.add_url_rule(
+        "/export/<any(shows, venues, artists):kind>.<any(csv, jsonl):fmt>",
+        view_func=export_data,
+    )
+    app.add_url_rule("/stats", view_func=stats)
+    app.add_url_rule("/metrics", view_func=prometheus_metrics)
+    app.register_error_handler(404, not_found_error)
+    app.register_error_handler(500, server_error)
+
+    if not app.debug:
+        file_handler = FileHandler("error.log")
+        file_handler.setFormatter(
+            Formatter("%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]")
+        )
+        app.logger.setLevel(logging.INFO)
+        file_handler.setLevel(logging.INFO)
+        app.logger.addHandler(file_handler)
+        app.logger.info("errors")
+    return app
+
+
+# what flask, WSGI servers, asgi.py and bench.py load
+app = create_app()
 
 # ----------------------------------------------------------------------------#
 # Launch.
@@ -1,3 +1,5 @@
+from sqlalchemy.dialects.postgresql import ARRAY
+
 from base import db
 
 
@@ -9,12 +11,32 @@ class Artist(db.Model):
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String), nullable=False)
+    # postgresql ARRAY for the && / @> operators served by ix_Artist_genres
+    genres = db.Column(ARRAY(db.String), nullable=False)
     image_link = db.Column(db.String(250))
     facebook_link = db.Column(db.String(250))
     website_link = db.Column(db.String(250))
     seeking_venue = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(500))
+    # maintained by counters.py, read by the list pages
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, server_default="0")
+    past_shows_count = db.Column(db.Integer, nullable=False, server_default="0")
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+    )
+
+    __table_args__ = (
+        db.Index(
+            "ix_Artist_name_trgm",
+            "name",
+            postgresql_using="gist",
+            postgresql_ops={"name": "gist_trgm_ops"},
+        ),
+        db.Index("ix_Artist_genres", "genres", postgresql_using="gin"),
+    )
 
     # TODO: implement any missing fields, as a database migration using Flask-Migrate
     shows = db.relationship("Show", backref="artist", lazy=True)
@@ -0,0 +1,153 @@
+"""ASGI entry point: ``uvicorn asgi:application``.
+
+Venue and artist pages are served from SQLAlchemy's asyncio engine, so a
+worker is not held while their queries run. A request with nothing to
+revalidate or reuse runs the page validators and the page query concurrently
+on two connections; otherwise the validators run first, so a 304 never waits
+for the page query. Every other request is passed to the Flask app through
+asgiref's WSGI adapter.
+
+Needs the async extras: ``pip install asgiref asyncpg uvicorn``.
+"""
+import asyncio
+from datetime import datetime
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import make_response, render_template, session
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+import app as fyyur
+from app import app
+from artist import Artist
+from conditional import add_validators, not_modified
+from show import Show
+from venue import Venue
+
+engine = create_async_engine(
+    app.config["ASYNC_SQLALCHEMY_DATABASE_URI"],
+    **app.config["ASYNC_SQLALCHEMY_ENGINE_OPTIONS"],
+)
+Session = async_sessionmaker(engine, expire_on_commit=False)
+detail_cache = app.extensions["detail_cache"]
+wsgi_application = WsgiToAsgi(app)
+
+# endpoint: (model, view argument, validator, template, template variable)
+DETAIL_PAGES = {
+    "show_venue": (Venue, "venue_id", fyyur.venue_modified, "pages/show_venue.html", "venue"),
+    "show_artist": (Artist, "artist_id", fyyur.artist_modified, "pages/show_artist.html", "artist"),
+}
+
+
+def _environ(scope):
+    headers = [
+        (name.decode("latin1"), value.decode("latin1"))
+        for name, value in scope["headers"]
+    ]
+    host = dict((name.lower(), value) for name, value in headers).get("host", "localhost")
+    return EnvironBuilder(
+        path=scope["path"],
+        base_url=f"{scope.get('scheme', 'http')}://{host}{scope.get('root_path', '')}",
+        query_string=scope["query_string"].decode("latin1"),
+        method=scope["method"],
+        headers=headers,
+    ).get_environ()
+
+
+async def _send(response, send, head=False):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": response.status_code,
+            "headers": [
+                (name.lower().encode("latin1"), value.encode("latin1"))
+                for name, value in response.headers.items()
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": b"" if head else response.get_data()})
+
+
+async def detail_page(environ, endpoint, entity_id):
+    """Render a venue/artist page, or return None to fall back to Flask."""
+    model, _, changed, _, _ = DETAIL_PAGES[endpoint]
+    key = (model.__tablename__, entity_id)
+    with app.request_context(environ):
+        # flashed messages are popped from the session cookie, leave to Flask
+        if session.get("_flashes"):
+            return None
+        validator = changed(entity_id)
+        statement = Show.for_detail(model, entity_id, datetime.now()).statement
+
+    async with Session() as validators, Session() as pages:
+        page = None
+        if key in detail_cache or "HTTP_IF_NONE_MATCH" in environ:
+            # the validator first: a 304, or a cached payload, needs no page
+            row = (await validators.execute(validator)).first()
+        else:
+            # nothing to revalidate or reuse, the page is needed either way
+            result, page = await asyncio.gather(
+                validators.execute(validator), pages.execute(statement)
+            )
+            row = result.first()
+        if row is None:
+            # deleted (since it was cached), Flask renders the 404
+            return None
+        version = tuple(row)
+        with app.request_context(environ):
+            response = not_modified(version)
+        if response is not None:
+            return response
+        payload = None
+        if page is None:
+            payload = detail_cache.get(key, version)
+            if payload is None:
+                page = await pages.execute(statement)
+        rows = None if page is None else page.all()
+
+    # assembling and rendering are CPU work, kept off the event loop
+    return await asyncio.to_thread(
+        _render_detail, environ, endpoint, key, version, payload, rows
+    )
+
+
+def _render_detail(environ, endpoint, key, version, payload, rows):
+    model, _, _, template, name = DETAIL_PAGES[endpoint]
+    with app.request_context(environ):
+        if payload is None:
+            assembled = fyyur.assemble_detail(model, rows)
+            if assembled is None:
+                return None
+            payload, rollover = assembled
+            detail_cache.set(key, payload, rollover, version)
+        response = make_response(render_template(template, **{name: payload}))
+        add_validators(response, version)
+        return response
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] == "http" and scope["method"] in ("GET", "HEAD"):
+        environ = _environ(scope)
+        try:
+            endpoint, args = app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            endpoint = None
+        if endpoint in DETAIL_PAGES:
+            argument = DETAIL_PAGES[endpoint][1]
+            response = await detail_page(environ, endpoint, args[argument])
+            if response is not None:
+                await _send(response, send, head=scope["method"] == "HEAD")
+                return
+
+    await wsgi_application(scope, receive, send)
@@ -0,0 +1,124 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import request, send_from_directory, url_for
+
+try:
+    import rcssmin
+except ImportError:  # pragma: no cover - optional, falls back to _minify_css
+    rcssmin = None
+try:
+    import rjsmin
+except ImportError:  # pragma: no cover - optional, scripts are only joined
+    rjsmin = None
+
+# bundle name: source files under static/, concatenated in this order
+BUNDLES = {
+    "main.css": [
+        "css/bootstrap.min.css",
+        "css/layout.main.css",
+        "css/main.css",
+        "css/main.responsive.css",
+        "css/main.quickfix.css",
+    ],
+    # loaded synchronously in <head>
+    "head.js": [
+        "js/libs/modernizr-2.8.2.min.js",
+        "js/libs/moment.min.js",
+    ],
+    # deferred, after jQuery
+    "main.js": [
+        "js/script.js",
+        "js/libs/bootstrap-3.1.1.min.js",
+        "js/plugins.js",
+    ],
+}
+
+# bundles live one level below static/ like css/, so url(../fonts/...) holds
+DIST = "dist"
+MANIFEST = "manifest.json"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_CSS_COMMENT = re.compile(r"/\*(?!!).*?\*/", re.S)
+_CSS_SPACE = re.compile(r"\s+")
+_CSS_PUNCTUATION = re.compile(r"\s*([{};,])\s*")
+
+
+def _minify_css(source):
+    source = _CSS_COMMENT.sub("", source)
+    source = _CSS_SPACE.sub(" ", source)
+    return _CSS_PUNCTUATION.sub(r"\1", source).replace(";}", "}").strip()
+
+
+def minify(name, source):
+    if name.endswith(".css"):
+        return rcssmin.cssmin(source) if rcssmin is not None else _minify_css(source)
+    return rjsmin.jsmin(source) if rjsmin is not None else source
+
+
+def build(static_folder):
+    """Write every bundle as ``dist/<name>.<hash>.<ext>`` plus a ``.gz``.
+
+    Returns the manifest mapping bundle names to their paths under static/.
+    """
+    dist = os.path.join(static_folder, DIST)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    for name, sources in BUNDLES.items():
+        parts = []
+        for source in sources:
+            with open(os.path.join(static_folder, source), encoding="utf-8") as f:
+                parts.append(minify(name, f.read()))
+        # a lone ; keeps a script without a trailing semicolon from running on
+        content = ("\n" if name.endswith(".css") else "\n;\n").join(parts).encode()
+        stem, ext = os.path.splitext(name)
+        filename = f"{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}"
+        with open(os.path.join(dist, filename), "wb") as f:
+            f.write(content)
+        # mtime=0 so the same bundle always compresses to the same bytes
+        with open(os.path.join(dist, filename + ".gz"), "wb") as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        manifest[name] = f"{DIST}/{filename}"
+    with open(os.path.join(dist, MANIFEST), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def init_app(app):
+    """Register the ``asset_urls`` template helper and the bundle handler.
+
+    Without a built manifest the helper falls back to the source files, so
+    a checkout works before ``flask build-assets`` has been run.
+    """
+    dist = os.path.join(app.static_folder, DIST)
+    try:
+        with open(os.path.join(dist, MANIFEST)) as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        manifest = {}
+
+    @app.template_global()
+    def asset_urls(name):
+        if name in manifest:
+            return [url_for("static", filename=manifest[name])]
+        return [url_for("static", filename=source) for source in BUNDLES[name]]
+
+    # more specific than /static/<path:filename>, so it wins for bundles
+    @app.route(f"{app.static_url_path}/{DIST}/<path:filename>")
+    def asset(filename):
+        mimetype = mimetypes.guess_type(filename)[0]
+        gzipped = "gzip" in request.accept_encodings and os.path.isfile(
+            os.path.join(dist, filename + ".gz")
+        )
+        response = send_from_directory(
+            dist, filename + ".gz" if gzipped else filename, mimetype=mimetype
+        )
+        if gzipped:
+            response.headers["Content-Encoding"] = "gzip"
+        response.headers["Cache-Control"] = IMMUTABLE
+        response.vary.add("Accept-Encoding")
+        return response
@@ -1,14 +1,29 @@
+from flask_moment import Moment
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from sqlalchemy.orm import DeclarativeBase
-from flask import Flask
-from flask_moment import Moment
+
+from replicas import RoutingSession
+
+
 class Base(DeclarativeBase):
     pass
 
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
+moment = Moment()
+
+
+def lift_statement_timeout(engine):
+    """Open ``engine``'s connections without DB_STATEMENT_TIMEOUT_MS.
+
+    The timeout is meant for web requests; migrations, imports and the
+    counter jobs rewrite whole tables and build indexes.
+    """
+
+    @event.listens_for(engine, "do_connect")
+    def no_statement_timeout(dialect, connection_record, cargs, cparams):
+        cparams["options"] = "-c statement_timeout=0"
 
-app = Flask(__name__)
-moment = Moment(app)
-app.config.from_object("config")
-db.init_app(app)
+    # connections already open keep the timeout they were opened with
+    engine.dispose()
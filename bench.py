@@ -0,0 +1,524 @@
+"""Drive every read route of the app at a fixed concurrency.
+
+Usage: python bench.py [--concurrency 16] [--requests 200] [--url URL]
+       python bench.py --startup 10
+       python bench.py --metrics 100000
+       python bench.py --serialization 1000
+       python bench.py --datetime-filter 10000
+       python bench.py --listing-memory
+
+Without --url the app is served in-process by a threaded WSGI server. Per
+route it reports p50/p95/p99 latency, throughput and SQL statements per
+request (read from the Server-Timing header) and writes the results to a
+JSON file under bench-results/ so runs can be compared.
+
+--startup instead boots the app in fresh interpreters and records how long
+importing it and answering the first request take.
+
+--metrics times RequestMetrics without a database: observe() alone, many
+threads observing at once, short-lived threads like a thread-per-connection
+server's, and the per-request cost of its hooks on a trivial route.
+
+--serialization compares encoding one /artists page with api.dumps against
+rendering it with pages/artists.html, from synthetic rows in-process.
+
+--datetime-filter times the template's datetime filter against the one it
+replaced, which parsed every value with dateutil and looked up the Babel
+pattern on each call, for ISO string and datetime input. No database needed.
+
+--listing-memory renders the artist list in fresh interpreters against the
+seeded database and records each one's peak RSS: every row hydrated as an
+Artist (the listing before it was paged), every row as (id, name, updated_at)
+tuples, and the one keyset page /artists loads now.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlencode, urlsplit
+
+import babel.dates
+import dateutil.parser
+from flask import Flask, render_template
+from werkzeug.serving import make_server
+
+import api
+from app import app, format_datetime
+from artist import Artist
+from base import db
+from metrics import RequestMetrics
+from venue import Venue
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+# run in a fresh interpreter, "/" answers without touching the database
+STARTUP_PROBE = """
+import json, time
+start = time.perf_counter()
+from app import app
+imported = time.perf_counter()
+app.test_client().get("/")
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (time.perf_counter() - start) * 1000,
+}))
+"""
+
+# run in a fresh interpreter per approach, so each has its own peak RSS
+LISTING_PROBE = """
+import json, resource, sys
+from flask import render_template
+from app import app
+from artist import Artist
+from base import db
+from pagination import keyset_page
+
+def peak_kib():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+def render(data):
+    return render_template(
+        "pages/artists.html", artists=data, next_cursor=None, filters={}, facets=[]
+    )
+
+approach = sys.argv[1]
+columns = (Artist.id, Artist.name, Artist.updated_at.label("version"))
+with app.test_request_context("/artists"):
+    # connect and compile the template before the baseline
+    render(db.session.query(*columns).limit(1).all())
+    baseline = peak_kib()
+    if approach == "hydrated":
+        rows = [
+            {"id": artist.id, "name": artist.name, "version": artist.updated_at}
+            for artist in Artist.query.all()
+        ]
+    elif approach == "projected":
+        rows = db.session.query(*columns).all()
+    else:
+        rows, _ = keyset_page(
+            db.session.query(*columns), [Artist.id], None, app.config["ARTISTS_PER_PAGE"]
+        )
+    render(rows)
+    peak = peak_kib()
+    print(json.dumps({"rows": len(rows), "peak_rss_kib": peak, "growth_kib": peak - baseline}))
+"""
+LISTINGS = ("hydrated", "projected", "paged")
+
+
+def targets():
+    """Return ``(name, method, path, body)`` for every route worth timing."""
+    with app.app_context():
+        busiest_venue = (
+            db.session.query(Venue.id)
+            .order_by((Venue.upcoming_shows_count + Venue.past_shows_count).desc())
+            .limit(1)
+            .scalar()
+        )
+        busiest_artist = (
+            db.session.query(Artist.id)
+            .order_by((Artist.upcoming_shows_count + Artist.past_shows_count).desc())
+            .limit(1)
+            .scalar()
+        )
+        venue_id = db.session.query(Venue.id).order_by(Venue.id.desc()).limit(1).scalar()
+        artist_id = db.session.query(Artist.id).order_by(Artist.id.desc()).limit(1).scalar()
+    if None in (busiest_venue, busiest_artist):
+        raise SystemExit("No data found, run 'flask seed' first.")
+    search = lambda term: urlencode({"search_term": term})
+    return [
+        ("index", "GET", "/", None),
+        ("venues", "GET", "/venues", None),
+        ("artists", "GET", "/artists", None),
+        ("shows", "GET", "/shows", None),
+        ("show_venue busiest", "GET", f"/venues/{busiest_venue}", None),
+        ("show_venue", "GET", f"/venues/{venue_id}", None),
+        ("show_artist busiest", "GET", f"/artists/{busiest_artist}", None),
+        ("show_artist", "GET", f"/artists/{artist_id}", None),
+        ("edit_venue", "GET", f"/venues/{venue_id}/edit", None),
+        ("edit_artist", "GET", f"/artists/{artist_id}/edit", None),
+        ("create_venue_form", "GET", "/venues/create", None),
+        ("create_artist_form", "GET", "/artists/create", None),
+        ("create_shows", "GET", "/shows/create", None),
+        ("search_venues", "POST", "/venues/search", search("Blue")),
+        ("search_artists", "POST", "/artists/search", search("Tigers")),
+        ("api_venues", "GET", "/api/v1/venues", None),
+        ("api_artists", "GET", "/api/v1/artists?fields=id,name", None),
+        ("api_shows", "GET", "/api/v1/shows", None),
+        ("api_venue", "GET", f"/api/v1/venues/{venue_id}", None),
+        ("api_artist", "GET", f"/api/v1/artists/{artist_id}", None),
+    ]
+
+
+def hammer(host, port, method, path, body, count, samples, lock):
+    connection = http.client.HTTPConnection(host, port)
+    headers = {"Content-Type": "application/x-www-form-urlencoded"} if body else {}
+    for _ in range(count):
+        start = time.perf_counter()
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        response.read()
+        elapsed = time.perf_counter() - start
+        match = QUERIES.search(response.getheader("Server-Timing", ""))
+        with lock:
+            samples.append(
+                (elapsed, response.status, int(match.group(1)) if match else None)
+            )
+    connection.close()
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def measure(host, port, target, concurrency, requests):
+    name, method, path, body = target
+    samples, lock = [], threading.Lock()
+    per_thread = max(1, requests // concurrency)
+    threads = [
+        threading.Thread(
+            target=hammer,
+            args=(host, port, method, path, body, per_thread, samples, lock),
+        )
+        for _ in range(concurrency)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    latencies = sorted(sample[0] * 1000 for sample in samples)
+    queries = [sample[2] for sample in samples if sample[2] is not None]
+    return {
+        "method": method,
+        "path": path,
+        "requests": len(samples),
+        "errors": sum(1 for sample in samples if sample[1] >= 400),
+        "throughput_rps": round(len(samples) / wall, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "queries_per_request": round(statistics.mean(queries), 2) if queries else None,
+    }
+
+
+def startup(runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_PROBE],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        samples.append(json.loads(output.splitlines()[-1]))
+    return {
+        key: {
+            "median_ms": round(statistics.median(sample[key] for sample in samples), 1),
+            "max_ms": round(max(sample[key] for sample in samples), 1),
+        }
+        for key in ("import_ms", "first_request_ms")
+    }
+
+
+def listing_memory():
+    with app.app_context():
+        if not db.session.query(Artist.id).limit(1).scalar():
+            raise SystemExit("No data found, run 'flask seed' first.")
+    results = {}
+    for approach in LISTINGS:
+        output = subprocess.run(
+            [sys.executable, "-c", LISTING_PROBE, approach],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results[approach] = json.loads(output.splitlines()[-1])
+    return results
+
+
+def metrics_overhead(observations):
+    def observe_all(request_metrics, count):
+        for index in range(count):
+            request_metrics.observe("venues", "GET", 200, (index % 100) / 1000)
+
+    request_metrics = RequestMetrics()
+    start = time.perf_counter()
+    observe_all(request_metrics, observations)
+    observe_us = (time.perf_counter() - start) / observations * 1e6
+
+    # 8 threads at once, every observation must be in the scrape
+    request_metrics = RequestMetrics()
+    threads = [
+        threading.Thread(target=observe_all, args=(request_metrics, observations // 8))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    concurrent = request_metrics.snapshot()[0][("venues", "GET")][2]
+
+    # one thread per connection: exited threads must not leave shards behind
+    request_metrics = RequestMetrics()
+    connections = min(observations, 2000)
+    for _ in range(connections):
+        thread = threading.Thread(target=observe_all, args=(request_metrics, 1))
+        thread.start()
+        thread.join()
+    short_lived = request_metrics.snapshot()[0][("venues", "GET")][2]
+
+    def per_request_us(instrumented, requests=5000):
+        trivial = Flask(__name__)
+        trivial.add_url_rule("/", "index", lambda: "ok")
+        if instrumented:
+            RequestMetrics().init_app(trivial)
+        client = trivial.test_client()
+        client.get("/")
+        start = time.perf_counter()
+        for _ in range(requests):
+            client.get("/")
+        return (time.perf_counter() - start) / requests * 1e6
+
+    bare_us, instrumented_us = per_request_us(False), per_request_us(True)
+    return {
+        "observe_us": round(observe_us, 3),
+        "concurrent_observations": concurrent,
+        "concurrent_expected": observations // 8 * 8,
+        "short_lived_threads": connections,
+        "short_lived_observations": short_lived,
+        "shards_left": len(request_metrics._shards),
+        "request_bare_us": round(bare_us, 1),
+        "request_instrumented_us": round(instrumented_us, 1),
+    }
+
+
+def serialization(rows, repeats=20):
+    now = datetime.now()
+    # what /artists renders, as /api/v1/artists?fields=id,name,updated_at
+    artists = [
+        {"id": index, "name": f"The Blue Tigers {index}", "updated_at": now}
+        for index in range(rows)
+    ]
+    page = [
+        {"id": artist["id"], "name": artist["name"], "version": artist["updated_at"]}
+        for artist in artists
+    ]
+
+    def mean_ms(render, before=None):
+        samples = []
+        for _ in range(repeats):
+            if before:
+                before()
+            start = time.perf_counter()
+            render()
+            samples.append(time.perf_counter() - start)
+        return round(statistics.mean(samples) * 1000, 3)
+
+    def html():
+        return render_template(
+            "pages/artists.html", artists=page, next_cursor=None, filters={}, facets=[]
+        )
+
+    with app.test_request_context("/artists"):
+        # compile the template before timing
+        html_bytes = len(html().encode())
+        json_bytes = len(api.dumps({"data": artists, "next": None}))
+        return {
+            "json_ms": mean_ms(lambda: api.dumps({"data": artists, "next": None})),
+            "html_cold_ms": mean_ms(html, before=app.jinja_env.fragment_cache.clear),
+            "html_warm_ms": mean_ms(html),
+            "json_bytes": json_bytes,
+            "html_bytes": html_bytes,
+            "orjson": api.orjson is not None,
+        }
+
+
+def legacy_format_datetime(value, format="medium"):
+    # the filter before it took datetime objects, kept as the baseline
+    date = dateutil.parser.parse(value)
+    if format == "full":
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == "medium":
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format, locale="en")
+
+
+def datetime_filter(calls, repeats=5):
+    start = datetime(2026, 5, 21, 21, 30)
+    values = [start.replace(minute=index % 60) for index in range(calls)]
+    strings = [value.isoformat() for value in values]
+
+    def best_ms(filter, inputs):
+        samples = []
+        for _ in range(repeats):
+            begin = time.perf_counter()
+            for value in inputs:
+                filter(value, "full")
+            samples.append(time.perf_counter() - begin)
+        return round(min(samples) * 1000, 1)
+
+    return {
+        "old_string_ms": best_ms(legacy_format_datetime, strings),
+        # the views used to format datetimes to ISO for the old filter to parse
+        "old_datetime_ms": best_ms(
+            lambda value, format: legacy_format_datetime(value.isoformat(), format),
+            values,
+        ),
+        "new_string_ms": best_ms(format_datetime, strings),
+        "new_datetime_ms": best_ms(format_datetime, values),
+        "identical": all(
+            legacy_format_datetime(string, format) == format_datetime(value, format)
+            for string, value in zip(strings[:60], values)
+            for format in ("full", "medium")
+        ),
+    }
+
+
+def save(directory, results):
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True
+        ).stdout.strip()
+    except OSError:
+        commit = None
+    started = datetime.now()
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{started:%Y%m%dT%H%M%S}.json")
+    with open(path, "w") as output:
+        json.dump(
+            {"created_at": started.isoformat(), "commit": commit, **results},
+            output,
+            indent=2,
+        )
+    print(f"Results written to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="per route")
+    parser.add_argument("--url", help="benchmark a running server instead")
+    parser.add_argument("--output", default="bench-results")
+    parser.add_argument(
+        "--startup", type=int, metavar="RUNS", help="measure cold start instead"
+    )
+    parser.add_argument(
+        "--metrics",
+        type=int,
+        metavar="OBSERVATIONS",
+        help="measure the metrics overhead instead",
+    )
+    parser.add_argument(
+        "--serialization",
+        type=int,
+        metavar="ROWS",
+        help="compare JSON and HTML encoding of one page instead",
+    )
+    parser.add_argument(
+        "--datetime-filter",
+        type=int,
+        metavar="CALLS",
+        help="compare the old and new datetime filter instead",
+    )
+    parser.add_argument(
+        "--listing-memory",
+        action="store_true",
+        help="measure peak RSS of the artist listing approaches instead",
+    )
+    args = parser.parse_args()
+
+    if args.listing_memory:
+        results = listing_memory()
+        for approach, result in results.items():
+            print(
+                f"{approach:<10} {result['rows']:>8} rows  "
+                f"peak {result['peak_rss_kib'] / 1024:>8.1f} MiB  "
+                f"growth {result['growth_kib'] / 1024:>8.1f} MiB"
+            )
+        save(args.output, {"listing_memory": results})
+        return
+
+    if args.datetime_filter:
+        results = datetime_filter(args.datetime_filter)
+        for key, value in results.items():
+            print(f"{key:<16} {value}")
+        save(args.output, {"calls": args.datetime_filter, "datetime_filter": results})
+        return
+
+    if args.serialization:
+        results = serialization(args.serialization)
+        for key, value in results.items():
+            print(f"{key:<14} {value}")
+        save(args.output, {"rows": args.serialization, "serialization": results})
+        return
+
+    if args.metrics:
+        results = metrics_overhead(args.metrics)
+        for key, value in results.items():
+            print(f"{key:<26} {value}")
+        save(args.output, {"metrics": results})
+        return
+
+    if args.startup:
+        results = startup(args.startup)
+        for key, result in results.items():
+            print(
+                f"{key:<18} median {result['median_ms']:>8} ms  "
+                f"max {result['max_ms']:>8} ms"
+            )
+        save(args.output, {"runs": args.startup, "startup": results})
+        return
+
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        host, port = "127.0.0.1", server.server_port
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    results = {}
+    try:
+        for target in targets():
+            results[target[0]] = result = measure(
+                host, port, target, args.concurrency, args.requests
+            )
+            print(
+                f"{target[0]:<22} {result['throughput_rps']:>8} req/s  "
+                f"p50 {result['p50_ms']:>8} ms  p95 {result['p95_ms']:>8} ms  "
+                f"p99 {result['p99_ms']:>8} ms  "
+                f"{result['queries_per_request']} queries/req"
+                + (f"  {result['errors']} errors" if result["errors"] else "")
+            )
+    finally:
+        if server:
+            server.shutdown()
+
+    save(
+        args.output,
+        {
+            "concurrency": args.concurrency,
+            "requests_per_route": args.requests,
+            "routes": results,
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+
+
+class PayloadCache:
+    """Bounded LRU of assembled page payloads with a TTL per entry.
+
+    An entry also expires at its ``rollover`` time, e.g. when its next
+    upcoming show starts and would have to move to the past list. The
+    ``version`` must match the stored one, so a worker never serves a payload
+    older than the page validators it just computed; without a version
+    nothing is cached.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, version):
+        if version is None:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                payload, stored_version, deadline, rollover = entry
+                if (
+                    deadline > time.monotonic()
+                    and (rollover is None or rollover > datetime.now())
+                    and version == stored_version
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def __contains__(self, key):
+        # presence only, does not count as a hit or miss
+        with self._lock:
+            return key in self._entries
+
+    def set(self, key, payload, rollover=None, version=None):
+        if version is None:
+            return
+        with self._lock:
+            self._entries[key] = (
+                payload,
+                version,
+                time.monotonic() + self.ttl,
+                rollover,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,230 @@
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from functools import wraps
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func
+
+from base import db, lift_statement_timeout
+import counters
+from artist import Artist
+from show import Show
+from venue import Venue
+
+
+def long_running(command):
+    """Run ``command`` without the statement timeout of web requests."""
+
+    @wraps(command)
+    def wrapper(*args, **kwargs):
+        for engine in db.engines.values():
+            lift_statement_timeout(engine)
+        return command(*args, **kwargs)
+
+    return wrapper
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def _explain(query):
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    result = db.session.connection().exec_driver_sql(
+        "EXPLAIN (FORMAT JSON) " + compiled.string, compiled.params
+    )
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+@click.command("check-plans")
+@with_appcontext
+def check_plans():
+    """Fail if the detail-page show queries stop using an index on Show."""
+    current_time = datetime.now()
+    venue_id = (
+        db.session.query(Show.venue_id)
+        .group_by(Show.venue_id)
+        .order_by(func.count().desc())
+        .limit(1)
+        .scalar()
+    )
+    artist_id = (
+        db.session.query(Show.artist_id)
+        .group_by(Show.artist_id)
+        .order_by(func.count().desc())
+        .limit(1)
+        .scalar()
+    )
+    if venue_id is None or artist_id is None:
+        raise click.ClickException("No shows found, seed the database first.")
+
+    queries = {
+        "show_venue": Show.for_detail(Venue, venue_id, current_time),
+        "show_artist": Show.for_detail(Artist, artist_id, current_time),
+    }
+    failed = False
+    for name, query in queries.items():
+        scans = [
+            node["Node Type"]
+            for node in _plan_nodes(_explain(query))
+            if node.get("Relation Name") == Show.__tablename__
+        ]
+        ok = bool(scans) and "Seq Scan" not in scans
+        failed = failed or not ok
+        click.echo(f"{'ok  ' if ok else 'FAIL'} {name}: {', '.join(scans)}")
+    if failed:
+        sys.exit(1)
+
+
+@click.command("import")
+@with_appcontext
+@long_running
+@click.argument("kind", type=click.Choice(["artists", "shows", "venues"]))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option(
+    "--format",
+    "fmt",
+    type=click.Choice(["csv", "jsonl"]),
+    help="Input format, defaults to the file extension.",
+)
+@click.option("--batch-size", default=5000, show_default=True)
+@click.option(
+    "--dead-letter",
+    type=click.Path(dir_okay=False),
+    help="Where rejected rows go, defaults to PATH.rejected.jsonl.",
+)
+def import_command(kind, path, fmt, batch_size, dead_letter):
+    """Bulk load venues, artists or shows from a CSV or JSONL file."""
+    import importer
+
+    fmt = fmt or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    dead_letter = dead_letter or f"{path}.rejected.jsonl"
+    start = time.perf_counter()
+
+    with open(path, newline="", encoding="utf-8") as source, open(
+        dead_letter, "w", encoding="utf-8"
+    ) as rejects:
+
+        def reject(line_number, row, errors):
+            rejects.write(
+                json.dumps({"line": line_number, "row": row, "errors": errors})
+                + "\n"
+            )
+
+        def progress(inserted, rejected):
+            elapsed = time.perf_counter() - start
+            click.echo(
+                f"{inserted} inserted, {rejected} rejected, "
+                f"{inserted / elapsed:.0f} rows/s",
+                err=True,
+            )
+
+        inserted, rejected = importer.load(
+            kind, importer.read_rows(source, fmt), batch_size, reject, progress
+        )
+
+    elapsed = time.perf_counter() - start
+    if not rejected:
+        os.remove(dead_letter)
+    click.echo(
+        f"Imported {inserted} {kind} in {elapsed:.1f}s "
+        f"({inserted / elapsed if elapsed else 0:.0f} rows/s), "
+        f"rejected {rejected}" + (f" (see {dead_letter})" if rejected else "")
+    )
+
+
+@click.command("rollover-shows")
+@with_appcontext
+@long_running
+def rollover_shows():
+    """Move shows that have started from the upcoming to the past counters."""
+    moved = counters.rollover()
+    click.echo(f"Rolled {moved} shows over to past.")
+
+
+@click.command("check-counters")
+@with_appcontext
+@long_running
+@click.option("--fix", is_flag=True, help="Overwrite wrong counters with the recount.")
+def check_counters(fix):
+    """Compare the stored show counters with a full recount of Show."""
+    wrong = 0
+    for model in (Venue, Artist):
+        for entity_id, stored, recounted in list(counters.mismatches(model)):
+            wrong += 1
+            click.echo(
+                f"{model.__tablename__} {entity_id}: upcoming/past stored "
+                f"{stored[0]}/{stored[1]}, recounted {recounted[0]}/{recounted[1]}"
+            )
+            if fix:
+                db.session.query(model).filter(model.id == entity_id).update(
+                    {
+                        "upcoming_shows_count": recounted[0],
+                        "past_shows_count": recounted[1],
+                    }
+                )
+    if fix and wrong:
+        db.session.commit()
+    click.echo(f"{wrong} mismatched counters" + (" fixed." if fix and wrong else "."))
+    if wrong and not fix:
+        sys.exit(1)
+
+
+@click.command("seed")
+@with_appcontext
+@long_running
+@click.option("--venues", default=1000, show_default=True)
+@click.option("--artists", default=5000, show_default=True)
+@click.option("--shows", default=50000, show_default=True)
+@click.option("--seed", "random_seed", default=42, show_default=True)
+@click.option(
+    "--skew",
+    default=3.0,
+    show_default=True,
+    help="Higher values concentrate shows on fewer venues and artists.",
+)
+@click.option("--batch-size", default=10000, show_default=True)
+def seed_command(venues, artists, shows, random_seed, skew, batch_size):
+    """Fill the database with reproducible synthetic data for benchmarks."""
+    import seed as synthetic
+
+    start = time.perf_counter()
+
+    def progress(table, inserted):
+        click.echo(f"{table}: {inserted} rows", err=True)
+
+    synthetic.seed(venues, artists, shows, random_seed, skew, batch_size, progress)
+    click.echo(f"Seeded in {time.perf_counter() - start:.1f}s.")
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets():
+    """Bundle, minify, fingerprint and gzip the CSS and JS under static/."""
+    import assets
+
+    for name, path in assets.build(current_app.static_folder).items():
+        click.echo(f"{name} -> {path}")
+
+
+def init_app(app):
+    commands = (
+        check_plans,
+        import_command,
+        rollover_shows,
+        check_counters,
+        seed_command,
+        build_assets,
+    )
+    for command in commands:
+        app.cli.add_command(command)
@@ -0,0 +1,80 @@
+import hashlib
+from datetime import datetime
+from functools import wraps
+
+from flask import Response, g, make_response, request, session
+
+from base import db
+
+# Pages without any data behind them only change on deploy
+STARTED_AT = datetime.now().replace(microsecond=0)
+
+
+def conditional(changed=None):
+    """Answer GETs with 304 when the client's copy is still current.
+
+    ``changed`` receives the view's arguments and returns a SELECT of one row
+    whose columns together identify the page content, or no row to skip
+    validation (e.g. unknown id). Without it the page is treated as changing
+    only on deploy.
+
+    The columns are compared as a whole rather than by their latest value:
+    ``now()`` is the transaction's start time, so a write can commit with a
+    timestamp older than one already handed out, and only equality sees it.
+    """
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            # flashed messages are one-shot, never revalidate those pages
+            if session.get("_flashes"):
+                return view(**kwargs)
+            if changed is None:
+                version = (STARTED_AT,)
+            else:
+                row = db.session.execute(changed(**kwargs)).first()
+                if row is None:
+                    return view(**kwargs)
+                version = tuple(row)
+            # lets the view check cached payloads against the same version
+            g.page_version = version
+
+            response = not_modified(version)
+            if response is not None:
+                return response
+
+            response = make_response(view(**kwargs))
+            if response.status_code == 200:
+                add_validators(response, version)
+            return response
+
+        return wrapper
+
+    return decorator
+
+
+def not_modified(version):
+    """Return a 304 response if the request's If-None-Match is current.
+
+    If-Modified-Since alone never answers 304, a date cannot tell a write
+    stamped in the past from no write at all.
+    """
+    response = Response()
+    response.set_etag(etag(version), weak=True)
+    response.make_conditional(request)
+    if response.status_code == 304:
+        return response
+    return None
+
+
+def etag(version):
+    digest = hashlib.blake2b(repr(version).encode(), digest_size=10).hexdigest()
+    return f"{request.endpoint}-{digest}"
+
+
+def add_validators(response, version):
+    response.set_etag(etag(version), weak=True)
+    stamps = [value for value in version if isinstance(value, datetime)]
+    if stamps:
+        response.last_modified = max(stamps)
+    response.cache_control.no_cache = True
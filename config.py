@@ -1,8 +1,31 @@
 import os
-SECRET_KEY = os.urandom(32)
+from pool import TimedQueuePool
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
+
+def _shared_secret_key(path):
+    # the first process to boot generates the key, every later one reads it
+    if not os.path.exists(path):
+        staging = '%s.%d' % (path, os.getpid())
+        with os.fdopen(os.open(staging, os.O_WRONLY | os.O_CREAT, 0o600), 'wb') as f:
+            f.write(os.urandom(32))
+        try:
+            os.link(staging, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(staging)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+# Must be the same in every worker, or sessions and flashed messages signed by
+# one worker are rejected by the others
+SECRET_KEY = os.environ.get('SECRET_KEY') or _shared_secret_key(
+    os.path.join(basedir, '.secret_key')
+)
+
 # Enable debug mode.
 DEBUG = True
 
@@ -10,4 +33,92 @@ DEBUG = True
 
 
 # TODO IMPLEMENT DATABASE URL
-SQLALCHEMY_DATABASE_URI = 'postgresql://postgres:1@localhost:5432/fyyur'
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL', 'postgresql://postgres:1@localhost:5432/fyyur'
+)
+
+# Connection pool, overridable per deployment through the environment
+SQLALCHEMY_ENGINE_OPTIONS = {
+    'poolclass': TimedQueuePool,
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+    'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+    'pool_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+    # for web requests; flask commands and migrations lift it, see
+    # base.lift_statement_timeout
+    'connect_args': {
+        'options': '-c statement_timeout=%d'
+        % int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+    },
+}
+
+# Read replicas, comma separated. GET requests read from one of them, for a
+# local setup point this at a second database, e.g.
+# DATABASE_REPLICA_URLS=postgresql://postgres:1@localhost:5432/fyyur_replica
+# (tests/test_replicas.py runs against two such databases)
+SQLALCHEMY_BINDS = {
+    'replica%d' % i: url.strip()
+    for i, url in enumerate(os.environ.get('DATABASE_REPLICA_URLS', '').split(','))
+    if url.strip()
+}
+
+# Seconds after a write during which that client keeps reading from the primary
+READ_YOUR_WRITES_SECONDS = float(os.environ.get('READ_YOUR_WRITES_SECONDS', 5))
+
+# The asyncio engine behind asgi.py, same pool settings as the sync engine
+ASYNC_SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'ASYNC_DATABASE_URL',
+    SQLALCHEMY_DATABASE_URI.replace('postgresql://', 'postgresql+asyncpg://', 1),
+)
+ASYNC_SQLALCHEMY_ENGINE_OPTIONS = {
+    'pool_size': SQLALCHEMY_ENGINE_OPTIONS['pool_size'],
+    'max_overflow': SQLALCHEMY_ENGINE_OPTIONS['max_overflow'],
+    'pool_timeout': SQLALCHEMY_ENGINE_OPTIONS['pool_timeout'],
+    'pool_recycle': SQLALCHEMY_ENGINE_OPTIONS['pool_recycle'],
+    'pool_pre_ping': SQLALCHEMY_ENGINE_OPTIONS['pool_pre_ping'],
+    'connect_args': {
+        'server_settings': {
+            'statement_timeout': str(int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000)))
+        }
+    },
+}
+
+# Number of rows rendered per page of /shows, /venues and /artists
+SHOWS_PER_PAGE = 60
+VENUES_PER_PAGE = 100
+ARTISTS_PER_PAGE = 100
+
+# Maximum number of rows returned per page of venue/artist search
+SEARCH_RESULTS_LIMIT = 20
+# Shorter search terms have no trigram to look up and return nothing
+SEARCH_MIN_LENGTH = 3
+
+# In-process cache of venue/artist detail payloads
+DETAIL_CACHE_SIZE = 512
+DETAIL_CACHE_TTL = 300
+
+# Genre facet counts of /venues and /artists, per filter set and table version
+FACET_CACHE_SIZE = 256
+FACET_CACHE_TTL = 300
+
+# Compiled templates, shared by every worker and kept across restarts
+JINJA_BYTECODE_CACHE_DIR = os.environ.get(
+    'JINJA_BYTECODE_CACHE_DIR', os.path.join(basedir, '.jinja_cache')
+)
+
+# Rendered {% cache %} fragments of the list pages, keyed by id and version
+FRAGMENT_CACHE_SIZE = 5000
+FRAGMENT_CACHE_TTL = 3600
+
+# Most shows one /shows/schedule submission may create
+SHOW_SCHEDULE_MAX = 500
+# Days after the start time a recurrence rule may reach
+SHOW_SCHEDULE_DAYS = 730
+
+# Page sizes of the JSON API, ?limit= can ask for up to the maximum
+API_PAGE_SIZE = 100
+API_MAX_PAGE_SIZE = 1000
+
+# Statements slower than this are written to slow_queries.log
+SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', 200))
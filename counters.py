@@ -0,0 +1,153 @@
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import Integer, column, func, update, values
+
+from base import db
+from artist import Artist
+from show import Show
+from venue import Venue
+from version import Version
+
+# Version row holding the time up to which shows have been rolled into "past"
+ROLLOVER = "rollover"
+
+
+def watermark(for_update=False):
+    """Return the rollover watermark, locking its row for this transaction.
+
+    Writers take a shared lock and the rollover job an exclusive one, so a
+    show is never classified against a watermark that is moving under it.
+    """
+    return (
+        db.session.query(Version.updated_at)
+        .filter(Version.name == ROLLOVER)
+        .with_for_update(read=not for_update)
+        .scalar()
+    )
+
+
+def _apply(model, deltas):
+    # deltas: {id: (upcoming, past)}, applied in one UPDATE ... FROM (VALUES ...)
+    if not deltas:
+        return
+    changes = values(
+        column("id", Integer),
+        column("upcoming", Integer),
+        column("past", Integer),
+        name="changes",
+    ).data([(key, upcoming, past) for key, (upcoming, past) in sorted(deltas.items())])
+    db.session.execute(
+        update(model)
+        .where(model.id == changes.c.id)
+        .values(
+            upcoming_shows_count=model.upcoming_shows_count + changes.c.upcoming,
+            past_shows_count=model.past_shows_count + changes.c.past,
+        )
+    )
+
+
+def record_shows(shows, sign=1):
+    """Count newly inserted (``sign=1``) or deleted (``sign=-1``) shows.
+
+    ``shows`` is an iterable of ``(venue_id, artist_id, start_time)``. Must
+    run in the transaction that writes the shows.
+    """
+    mark = watermark()
+    upcoming = {"venue": Counter(), "artist": Counter()}
+    past = {"venue": Counter(), "artist": Counter()}
+    for venue_id, artist_id, start_time in shows:
+        bucket = upcoming if mark is None or start_time > mark else past
+        bucket["venue"][venue_id] += sign
+        bucket["artist"][artist_id] += sign
+    for model, side in ((Venue, "venue"), (Artist, "artist")):
+        keys = set(upcoming[side]) | set(past[side])
+        _apply(model, {key: (upcoming[side][key], past[side][key]) for key in keys})
+
+
+def rollover(now=None):
+    """Move shows that started since the last run from upcoming to past.
+
+    Returns the number of shows moved. Commits.
+    """
+    now = now or datetime.now()
+    last = watermark(for_update=True)
+    if last is None or now <= last:
+        db.session.rollback()
+        return 0
+    moved = 0
+    for model, key in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        rows = (
+            db.session.query(key, func.count())
+            .filter(Show.start_time > last, Show.start_time <= now)
+            .group_by(key)
+            .all()
+        )
+        _apply(model, {row[0]: (-row[1], row[1]) for row in rows})
+        if model is Venue:
+            moved = sum(row[1] for row in rows)
+    db.session.query(Version).filter(Version.name == ROLLOVER).update(
+        {"updated_at": now}
+    )
+    if moved:
+        Version.bump("Venue", "Artist")
+    db.session.commit()
+    return moved
+
+
+def mismatches(model):
+    """Yield ``(id, stored, recounted)`` where the counters disagree."""
+    key = Show.venue_id if model is Venue else Show.artist_id
+    mark = watermark()
+    recount = (
+        db.session.query(
+            key.label("id"),
+            func.count().filter(Show.start_time > mark).label("upcoming"),
+            func.count().filter(Show.start_time <= mark).label("past"),
+        )
+        .group_by(key)
+        .subquery()
+    )
+    rows = (
+        db.session.query(
+            model.id,
+            model.upcoming_shows_count,
+            model.past_shows_count,
+            func.coalesce(recount.c.upcoming, 0),
+            func.coalesce(recount.c.past, 0),
+        )
+        .outerjoin(recount, recount.c.id == model.id)
+        .filter(
+            (model.upcoming_shows_count != func.coalesce(recount.c.upcoming, 0))
+            | (model.past_shows_count != func.coalesce(recount.c.past, 0))
+        )
+        .order_by(model.id)
+    )
+    for row in rows:
+        yield row[0], (row[1], row[2]), (row[3], row[4])
+
+
+def recount():
+    """Rebuild every counter from a full scan of Show against the watermark."""
+    mark = watermark(for_update=True)
+    for model, key in ((Venue, Show.venue_id), (Artist, Show.artist_id)):
+        recounted = (
+            db.session.query(
+                key.label("id"),
+                func.count().filter(Show.start_time > mark).label("upcoming"),
+                func.count().filter(Show.start_time <= mark).label("past"),
+            )
+            .group_by(key)
+            .subquery()
+        )
+        db.session.execute(
+            update(model).values(upcoming_shows_count=0, past_shows_count=0)
+        )
+        db.session.execute(
+            update(model)
+            .where(model.id == recounted.c.id)
+            .values(
+                upcoming_shows_count=recounted.c.upcoming,
+                past_shows_count=recounted.c.past,
+            )
+        )
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+
+from base import db
+from artist import Artist
+from show import Show
+from venue import Venue
+
+FORMATS = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+def export_statement(kind, since=None):
+    if kind == "shows":
+        statement = Show.listing().statement
+        if since is not None:
+            statement = statement.where(Show.start_time >= since)
+        return statement.order_by(Show.start_time, Show.id)
+    model, key = (Venue, Show.venue_id) if kind == "venues" else (Artist, Show.artist_id)
+    statement = select(*model.__table__.columns)
+    if since is not None:
+        statement = statement.where(
+            select(Show.id).where(key == model.id, Show.start_time >= since).exists()
+        )
+    return statement.order_by(model.id)
+
+
+def stream(kind, fmt, since=None, batch_size=1000):
+    """Yield the export as encoded chunks, one chunk per fetched batch.
+
+    ``yield_per`` makes psycopg use a server-side cursor, so memory stays
+    bounded by ``batch_size`` rows whatever the size of the export.
+    """
+    result = db.session.execute(
+        export_statement(kind, since).execution_options(yield_per=batch_size)
+    )
+    columns = list(result.keys())
+    encode = _csv_chunk if fmt == "csv" else _jsonl_chunk
+    if fmt == "csv":
+        yield _csv_chunk([columns], columns)
+    for partition in result.partitions():
+        yield encode([_plain(row, columns) for row in partition], columns)
+
+
+def _plain(row, columns):
+    values = []
+    for value in row:
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        values.append(value)
+    return values
+
+
+def _csv_chunk(rows, columns):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            [",".join(value) if isinstance(value, list) else value for value in row]
+        )
+    return buffer.getvalue()
+
+
+def _jsonl_chunk(rows, columns):
+    return "".join(json.dumps(dict(zip(columns, row))) + "\n" for row in rows)
@@ -6,13 +6,26 @@ from fabric.contrib.console import confirm
 
 def test():
     with settings(warn_only=True):
-        result = local(
-            "python test_tasks.py -v && python test_users.py -v", capture=True
-        )
+        # the database tests need TEST_DATABASE_URL, see tests/conftest.py
+        result = local("python -m pytest -v", capture=True)
     if result.failed and not confirm("Tests failed. Continue?"):
         abort("Aborted at user request.")
 
 
+# benchmark against a seeded database, e.g. `flask seed --shows 5000000` first
+
+
+def bench():
+    local("python bench.py")
+
+
+# fingerprinted, gzipped bundles under static/dist/, rebuild after CSS/JS edits
+
+
+def assets():
+    local("flask --app app build-assets")
+
+
 def commit():
     message = raw_input("Enter a git commit message: ")
     local("git add . && git commit -am '{}'".format(message))
@@ -39,9 +52,7 @@ def heroku():
 
 
 def heroku_test():
-    local(
-        "heroku run python test_tasks.py -v && heroku run python test_users.py -v"
-    )
+    local("heroku run python -m pytest -v")
 
 
 def deploy():
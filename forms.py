@@ -1,7 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from itertools import islice
+from dateutil.rrule import rrulestr
+from flask import current_app
 from flask_wtf import Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField
-from wtforms.validators import DataRequired, AnyOf, URL
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, BooleanField, TextAreaField
+from wtforms.validators import DataRequired, AnyOf, URL, Optional
 
 class ShowForm(Form):
     artist_id = StringField(
@@ -16,6 +19,104 @@ class ShowForm(Form):
         default= datetime.today()
     )
 
+RECURRENCE_PARTS = {'FREQ', 'INTERVAL', 'COUNT', 'UNTIL', 'WKST', 'BYMONTH', 'BYDAY', 'BYHOUR', 'BYMINUTE'}
+RECURRENCE_FREQS = {'DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY'}
+WEEKDAYS = {'MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU'}
+MONTHS = {str(month) for month in range(1, 13)}
+
+class ShowScheduleForm(ShowForm):
+    # either the show above repeated by an RFC 5545 rule, e.g. FREQ=WEEKLY;COUNT=8
+    recurrence = StringField(
+        'recurrence'
+    )
+    # or one "artist_id, venue_id, YYYY-MM-DD HH:MM" per line
+    shows = TextAreaField(
+        'shows'
+    )
+    start_time = DateTimeField(
+        'start_time',
+        validators=[Optional()],
+        format=['%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M'],
+        default= datetime.today()
+    )
+
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+        limit = current_app.config['SHOW_SCHEDULE_MAX']
+        self.shows.data = (self.shows.data or '').strip()
+        self.recurrence.data = (self.recurrence.data or '').strip()
+        if self.shows.data:
+            if len(self.shows.data.splitlines()) > limit:
+                self.shows.errors.append(f'At most {limit} shows at once.')
+                return False
+            return True
+        if not self.recurrence.data:
+            self.recurrence.errors.append('Give a recurrence rule or a list of shows.')
+            return False
+        if self.start_time.data is None:
+            self.start_time.errors.append('The recurrence starts at the start time.')
+            return False
+        # dateutil steps through periods until one matches, with no limit: only
+        # parts that match in every week or year are taken, at no finer than
+        # daily steps, and the rule is kept to a fixed number of days
+        parts = dict(
+            part.partition('=')[::2]
+            for part in self.recurrence.data.upper().removeprefix('RRULE:').split(';')
+        )
+        if (
+            '\n' in self.recurrence.data
+            or not set(parts) <= RECURRENCE_PARTS
+            or parts.get('FREQ') not in RECURRENCE_FREQS
+            or not set(parts.get('BYDAY', 'MO').split(',')) <= WEEKDAYS
+            or not set(parts.get('BYMONTH', '1').split(',')) <= MONTHS
+        ):
+            self.recurrence.errors.append(
+                'Only FREQ=DAILY, WEEKLY, MONTHLY or YEARLY with INTERVAL, COUNT, '
+                'UNTIL, BYMONTH (1-12), BYDAY (weekdays), BYHOUR and BYMINUTE.'
+            )
+            return False
+        try:
+            rule = rrulestr(self.recurrence.data, dtstart=self.start_time.data)
+        except (TypeError, ValueError):
+            self.recurrence.errors.append('Invalid rule, expected e.g. FREQ=WEEKLY;COUNT=8.')
+            return False
+        horizon = self.start_time.data + timedelta(days=current_app.config['SHOW_SCHEDULE_DAYS'])
+        if rule._count is None and rule._until is None:
+            self.recurrence.errors.append('The rule needs a COUNT or an UNTIL.')
+            return False
+        if rule._until is not None and rule._until > horizon:
+            self.recurrence.errors.append(f'UNTIL must be before {horizon:%Y-%m-%d}.')
+            return False
+        count = rule._count if rule._count is not None else limit + 1
+        rule = rule.replace(count=None, until=rule._until or horizon)
+        self.occurrences = list(islice(rule, min(count, limit + 1)))
+        if len(self.occurrences) > limit:
+            self.recurrence.errors.append(f'At most {limit} shows at once.')
+            return False
+        if not self.occurrences:
+            self.recurrence.errors.append(f'The rule gives no show before {horizon:%Y-%m-%d}.')
+            return False
+        return True
+
+    def rows(self):
+        """``(label, row)`` per show to create, rows as the importer reads them."""
+        if self.shows.data:
+            for line_number, line in enumerate(self.shows.data.splitlines(), start=1):
+                if not line.strip():
+                    continue
+                parts = [part.strip() for part in line.split(',')]
+                if len(parts) != 3:
+                    parts = []
+                yield f'line {line_number}', dict(zip(('artist_id', 'venue_id', 'start_time'), parts))
+        else:
+            for start_time in self.occurrences:
+                yield f'{start_time:%Y-%m-%d %H:%M}', {
+                    'artist_id': self.artist_id.data,
+                    'venue_id': self.venue_id.data,
+                    'start_time': start_time,
+                }
+
 class VenueForm(Form):
     name = StringField(
         'name', validators=[DataRequired()]
@@ -0,0 +1,61 @@
+import os
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+from cache import PayloadCache
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache "show", show.id, show.version %}...{% endcache %}``
+
+    Every argument but the last makes up the key; the body is rendered once
+    and its markup reused for as long as the version, typically the row's
+    ``updated_at``, stays the same.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            args.append(parser.parse_expression())
+        if len(args) < 2:
+            parser.fail("cache takes a key and a version", lineno)
+        body = parser.parse_statements(["name:endcache"], drop_needle=True)
+        key = nodes.Tuple(args[:-1], "load")
+        return nodes.CallBlock(
+            self.call_method("_render", [key, args[-1]]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, key, version, caller):
+        cache = self.environment.fragment_cache
+        if cache is None:
+            return caller()
+        fragment = cache.get(key, version)
+        if fragment is None:
+            fragment = caller()
+            cache.set(key, fragment, version=version)
+        return fragment
+
+
+def init_app(app):
+    """Persist compiled templates across workers and enable ``{% cache %}``.
+
+    Must run before anything touches ``app.jinja_env``.
+    """
+    directory = app.config["JINJA_BYTECODE_CACHE_DIR"]
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_options = {
+        **app.jinja_options,
+        "bytecode_cache": FileSystemBytecodeCache(directory),
+        "extensions": [*app.jinja_options.get("extensions", ()), FragmentCacheExtension],
+    }
+    app.jinja_env.fragment_cache = PayloadCache(
+        app.config["FRAGMENT_CACHE_SIZE"], app.config["FRAGMENT_CACHE_TTL"]
+    )
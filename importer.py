@@ -0,0 +1,179 @@
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import insert
+from werkzeug.datastructures import MultiDict
+from wtforms import BooleanField, DateTimeField, SelectMultipleField
+
+import counters
+from base import db
+from artist import Artist
+from forms import ArtistForm, ShowForm, VenueForm
+from show import Show
+from venue import Venue
+from version import Version
+
+KINDS = {
+    "venues": (Venue, VenueForm),
+    "artists": (Artist, ArtistForm),
+    "shows": (Show, ShowForm),
+}
+
+FALSE_VALUES = ("", "0", "n", "no", "false", "off")
+
+
+def read_rows(stream, fmt):
+    """Yield ``(line_number, row)`` pairs from a CSV or JSONL stream.
+
+    A JSONL line that does not parse is yielded as its text, for
+    ``validate()`` to reject.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield line_number, json.loads(line)
+                except ValueError:
+                    yield line_number, line.rstrip("\n")
+
+
+def to_formdata(row, field_types):
+    # map CSV/JSON values onto what the HTML form would have posted
+    formdata = MultiDict()
+    for name, value in row.items():
+        field_type = field_types.get(name)
+        if field_type is None or value is None:
+            continue
+        if field_type is BooleanField:
+            if isinstance(value, str):
+                value = value.strip().lower() not in FALSE_VALUES
+            if value:
+                formdata.add(name, "y")
+        elif field_type is SelectMultipleField:
+            if isinstance(value, str):
+                value = [item.strip() for item in value.split(",") if item.strip()]
+            for item in value:
+                formdata.add(name, item)
+        elif field_type is DateTimeField and isinstance(value, str):
+            try:
+                moment = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+            else:
+                # stored times are naive, in the server's time like
+                # datetime.now(); an offset is converted rather than dropped
+                if moment.tzinfo is not None:
+                    moment = moment.astimezone().replace(tzinfo=None)
+                value = moment.strftime("%Y-%m-%d %H:%M:%S")
+            formdata.add(name, value)
+        else:
+            formdata.add(name, str(value))
+    return formdata
+
+
+def form_field_types(form_class):
+    return {
+        name: type(field)
+        for name, field in form_class(
+            formdata=MultiDict(), meta={"csrf": False}
+        )._fields.items()
+    }
+
+
+def validate(kind, row, field_types):
+    """Return ``(values, errors)`` for one input row, using the form rules."""
+    model, form_class = KINDS[kind]
+    if not isinstance(row, dict):
+        return None, {"row": ["Not a JSON object."]}
+    # every field starts empty, so a missing column is rejected by the form's
+    # validators rather than filled in from its defaults (e.g. start_time)
+    form = form_class(
+        formdata=to_formdata(row, field_types),
+        meta={"csrf": False},
+        **dict.fromkeys(field_types),
+    )
+    if not form.validate():
+        return None, form.errors
+    columns = model.__table__.columns.keys()
+    values = {name: value for name, value in form.data.items() if name in columns}
+    if model is Show:
+        try:
+            values["artist_id"] = int(values["artist_id"])
+            values["venue_id"] = int(values["venue_id"])
+        except (TypeError, ValueError):
+            return None, {"artist_id/venue_id": ["Must be integer ids."]}
+    return values, None
+
+
+def missing_references(batch):
+    # one lookup per side per batch instead of one per row
+    found = {}
+    for model, key in ((Artist, "artist_id"), (Venue, "venue_id")):
+        ids = {values[key] for _, _, values in batch}
+        found[key] = {
+            row[0] for row in db.session.query(model.id).filter(model.id.in_(ids))
+        }
+    return [
+        (line_number, row, values)
+        for line_number, row, values in batch
+        if values["artist_id"] not in found["artist_id"]
+        or values["venue_id"] not in found["venue_id"]
+    ]
+
+
+def load(kind, rows, batch_size, reject, progress=None):
+    """Validate and insert ``rows`` in multi-row batches, one commit each.
+
+    Rejected rows are passed to ``reject(line_number, row, errors)``.
+    Returns ``(inserted, rejected)`` counts.
+    """
+    model, form_class = KINDS[kind]
+    field_types = form_field_types(form_class)
+    inserted = rejected = 0
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            break
+        batch = []
+        for line_number, row in chunk:
+            values, errors = validate(kind, row, field_types)
+            if errors:
+                reject(line_number, row, errors)
+                rejected += 1
+            else:
+                batch.append((line_number, row, values))
+        if batch and model is Show:
+            orphans = missing_references(batch)
+            for line_number, row, values in orphans:
+                reject(line_number, row, {"artist_id/venue_id": ["No such id."]})
+            rejected += len(orphans)
+            orphan_lines = {line_number for line_number, _, _ in orphans}
+            batch = [item for item in batch if item[0] not in orphan_lines]
+        if not batch:
+            continue
+        try:
+            # executemany with insertmanyvalues: multi-row INSERT statements
+            db.session.execute(insert(model), [values for _, _, values in batch])
+            if model is Show:
+                counters.record_shows(
+                    (values["venue_id"], values["artist_id"], values["start_time"])
+                    for _, _, values in batch
+                )
+            Version.bump(model.__tablename__)
+            db.session.commit()
+            inserted += len(batch)
+        except Exception as e:
+            db.session.rollback()
+            for line_number, row, _ in batch:
+                reject(line_number, row, {"database": [str(e).splitlines()[0]]})
+            rejected += len(batch)
+        if progress:
+            progress(inserted, rejected)
+    return inserted, rejected
@@ -0,0 +1,97 @@
+import json
+import logging
+import time
+
+from flask import before_render_template, g, has_request_context, request
+from flask import template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+slow_query_logger = logging.getLogger("fyyur.slow_queries")
+# set by init_app; the statement listeners below, like the slow query log,
+# are process-wide, so each app created does not add another set
+slow_query_seconds = float("inf")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    in_request = has_request_context() and "sql_count" in g
+    if in_request:
+        g.sql_count += 1
+        g.sql_time += elapsed
+        if elapsed > g.sql_slowest:
+            g.sql_slowest = elapsed
+    if elapsed >= slow_query_seconds:
+        slow_query_logger.warning(
+            json.dumps(
+                {
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "endpoint": request.endpoint if in_request else None,
+                    "path": request.path if in_request else None,
+                    "statement": " ".join(statement.split())[:2000],
+                }
+            )
+        )
+
+
+@event.listens_for(Engine, "handle_error")
+def handle_error(context):
+    starts = context.connection.info.get("query_start") if context.connection else None
+    if starts:
+        starts.pop()
+
+
+def init_app(app):
+    """Time every SQL statement and template render of each request.
+
+    Totals go out in a ``Server-Timing`` header and statements slower than
+    ``SLOW_QUERY_MS`` are written to the slow query log.
+    """
+    global slow_query_seconds
+    slow_query_seconds = app.config["SLOW_QUERY_MS"] / 1000
+
+    # renders outside a timed request (asgi.py's pages, CLI commands) have no
+    # timing state and are skipped
+    def render_started(sender, template, context, **extra):
+        if "render_start" in g:
+            g.render_start.append(time.perf_counter())
+
+    def render_finished(sender, template, context, **extra):
+        if g.get("render_start"):
+            elapsed = time.perf_counter() - g.render_start.pop()
+            # nested includes are already counted by the outer template
+            if not g.render_start:
+                g.render_time += elapsed
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    @app.before_request
+    def start_timing():
+        g.request_start = time.perf_counter()
+        g.sql_count = 0
+        g.sql_time = 0.0
+        g.sql_slowest = 0.0
+        g.render_start = []
+        g.render_time = 0.0
+
+    @app.after_request
+    def server_timing(response):
+        if "request_start" not in g:
+            return response
+        total = time.perf_counter() - g.request_start
+        response.headers["Server-Timing"] = ", ".join(
+            [
+                f'db;dur={g.sql_time * 1000:.2f};desc="{g.sql_count} queries"',
+                f"db-slowest;dur={g.sql_slowest * 1000:.2f}",
+                f"render;dur={g.render_time * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ]
+        )
+        return response
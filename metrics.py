@@ -0,0 +1,188 @@
+import itertools
+import threading
+import time
+import weakref
+from bisect import bisect_left
+
+from flask import g, request
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Shard:
+    # weakly referenceable, so its thread's exit can be noticed
+    __slots__ = ("latencies", "statuses", "__weakref__")
+
+    def __init__(self):
+        self.latencies = {}
+        self.statuses = {}
+
+
+class RequestMetrics:
+    """Per-endpoint latency histograms and status counters.
+
+    Every thread records into its own shard, so observing a request takes no
+    lock; a scrape sums the shards. The shard lock is only taken the first
+    time a thread records anything and when it exits, which folds its shard
+    into a shared total, so a thread-per-connection server keeps one shard
+    per live thread rather than one per connection ever served.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._shards = {}
+        self._shard_ids = itertools.count()
+        # what exited threads recorded
+        self._retired = ({}, {})
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            shard_id = next(self._shard_ids)
+            with self._shards_lock:
+                self._shards[shard_id] = (shard.latencies, shard.statuses)
+            # runs when the thread ends and its locals are released
+            weakref.finalize(shard, self._retire, shard_id)
+        return shard
+
+    def _retire(self, shard_id):
+        with self._shards_lock:
+            latencies, statuses = self._shards.pop(shard_id)
+            self._merge(self._retired, latencies, statuses)
+
+    def _merge(self, into, latencies, statuses):
+        into_latencies, into_statuses = into
+        for key, (counts, total, count) in dict(latencies).items():
+            entry = into_latencies.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            entry[0] = [a + b for a, b in zip(entry[0], counts)]
+            entry[1] += total
+            entry[2] += count
+        for key, count in dict(statuses).items():
+            into_statuses[key] = into_statuses.get(key, 0) + count
+
+    def observe(self, endpoint, method, status, seconds):
+        shard = self._shard()
+        latencies, statuses = shard.latencies, shard.statuses
+        entry = latencies.get((endpoint, method))
+        if entry is None:
+            entry = latencies[(endpoint, method)] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, seconds)
+        if index < len(self.buckets):
+            entry[0][index] += 1
+        entry[1] += seconds
+        entry[2] += 1
+        key = (endpoint, status)
+        statuses[key] = statuses.get(key, 0) + 1
+
+    def snapshot(self):
+        """Return ``(latencies, statuses)`` summed over all threads."""
+        totals = ({}, {})
+        with self._shards_lock:
+            shards = list(self._shards.values())
+            self._merge(totals, *self._retired)
+        for latencies, statuses in shards:
+            self._merge(totals, latencies, statuses)
+        return totals
+
+    def init_app(self, app):
+        app.extensions["request_metrics"] = self
+
+        @app.before_request
+        def start_metrics_timer():
+            g.metrics_start = time.perf_counter()
+
+        @app.after_request
+        def record_metrics(response):
+            if "metrics_start" in g:
+                self.observe(
+                    request.endpoint or "unmatched",
+                    request.method,
+                    response.status_code,
+                    time.perf_counter() - g.metrics_start,
+                )
+            return response
+
+
+def _labels(**labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels.items())
+
+
+def render(request_metrics, pool_stats, cache_stats):
+    """Format everything in the Prometheus text exposition format.
+
+    ``cache_stats`` maps each cache's name, its ``cache`` label, to its
+    ``stats()``.
+    """
+    latencies, statuses = request_metrics.snapshot()
+    lines = [
+        "# HELP fyyur_http_request_duration_seconds Request latency by endpoint.",
+        "# TYPE fyyur_http_request_duration_seconds histogram",
+    ]
+    for (endpoint, method), (counts, total, count) in sorted(latencies.items()):
+        labels = _labels(endpoint=endpoint, method=method)
+        cumulative = 0
+        for bound, bucket in zip(request_metrics.buckets, counts):
+            cumulative += bucket
+            lines.append(
+                f'fyyur_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}'
+            )
+        lines.append(
+            f'fyyur_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}'
+        )
+        lines.append(f"fyyur_http_request_duration_seconds_sum{{{labels}}} {total}")
+        lines.append(f"fyyur_http_request_duration_seconds_count{{{labels}}} {count}")
+
+    lines += [
+        "# HELP fyyur_http_responses_total Responses by endpoint and status code.",
+        "# TYPE fyyur_http_responses_total counter",
+    ]
+    for (endpoint, status), count in sorted(statuses.items()):
+        lines.append(
+            f"fyyur_http_responses_total{{{_labels(endpoint=endpoint, status=status)}}} {count}"
+        )
+
+    for name in ("size", "checked_in", "checked_out", "overflow"):
+        lines += [
+            f"# TYPE fyyur_db_pool_{name} gauge",
+            f"fyyur_db_pool_{name} {pool_stats[name]}",
+        ]
+    for name in ("checkouts", "timeouts"):
+        lines += [
+            f"# TYPE fyyur_db_pool_{name}_total counter",
+            f"fyyur_db_pool_{name}_total {pool_stats[name]}",
+        ]
+    lines += [
+        "# TYPE fyyur_db_pool_wait_seconds_total counter",
+        f"fyyur_db_pool_wait_seconds_total {pool_stats['wait_seconds_total']}",
+    ]
+
+    lines += [
+        "# HELP fyyur_cache_hits_total Cache lookups that found an entry, by cache.",
+        "# TYPE fyyur_cache_hits_total counter",
+    ]
+    for name, stats in sorted(cache_stats.items()):
+        lines.append(f"fyyur_cache_hits_total{{{_labels(cache=name)}}} {stats['hits']}")
+    lines += [
+        "# HELP fyyur_cache_misses_total Cache lookups that found no entry, by cache.",
+        "# TYPE fyyur_cache_misses_total counter",
+    ]
+    for name, stats in sorted(cache_stats.items()):
+        lines.append(f"fyyur_cache_misses_total{{{_labels(cache=name)}}} {stats['misses']}")
+    lines += [
+        "# HELP fyyur_cache_hit_ratio Hits over lookups since start, by cache.",
+        "# TYPE fyyur_cache_hit_ratio gauge",
+    ]
+    for name, stats in sorted(cache_stats.items()):
+        lookups = stats["hits"] + stats["misses"]
+        ratio = stats["hits"] / lookups if lookups else 0
+        lines.append(f"fyyur_cache_hit_ratio{{{_labels(cache=name)}}} {ratio}")
+    lines += [
+        "# HELP fyyur_cache_entries Entries held, by cache.",
+        "# TYPE fyyur_cache_entries gauge",
+    ]
+    for name, stats in sorted(cache_stats.items()):
+        lines.append(f"fyyur_cache_entries{{{_labels(cache=name)}}} {stats['size']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,28 @@
+"""Show time indexes
+
+Revision ID: 5b1f0c3e9a42
+Revises: 2707aafd39c2
+Create Date: 2026-10-18 09:12:41.308214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0c3e9a42'
+down_revision = '2707aafd39c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('Show', schema=None) as batch_op:
+        batch_op.create_index('ix_Show_venue_id_start_time', ['venue_id', 'start_time'], unique=False)
+        batch_op.create_index('ix_Show_artist_id_start_time', ['artist_id', 'start_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('Show', schema=None) as batch_op:
+        batch_op.drop_index('ix_Show_artist_id_start_time')
+        batch_op.drop_index('ix_Show_venue_id_start_time')
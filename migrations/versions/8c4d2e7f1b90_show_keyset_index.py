@@ -0,0 +1,26 @@
+"""Show keyset index
+
+Revision ID: 8c4d2e7f1b90
+Revises: 5b1f0c3e9a42
+Create Date: 2026-10-18 10:02:17.551930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c4d2e7f1b90'
+down_revision = '5b1f0c3e9a42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('Show', schema=None) as batch_op:
+        batch_op.create_index('ix_Show_start_time_id', ['start_time', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('Show', schema=None) as batch_op:
+        batch_op.drop_index('ix_Show_start_time_id')
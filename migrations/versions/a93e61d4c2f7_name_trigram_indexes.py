@@ -0,0 +1,33 @@
+"""Name trigram indexes
+
+Revision ID: a93e61d4c2f7
+Revises: 8c4d2e7f1b90
+Create Date: 2026-10-18 11:20:05.734118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a93e61d4c2f7'
+down_revision = '8c4d2e7f1b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.create_index('ix_Venue_name_trgm', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.create_index('ix_Artist_name_trgm', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.drop_index('ix_Artist_name_trgm', postgresql_using='gin')
+
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.drop_index('ix_Venue_name_trgm', postgresql_using='gin')
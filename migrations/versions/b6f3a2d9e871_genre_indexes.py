@@ -0,0 +1,32 @@
+"""Genre GIN indexes
+
+Revision ID: b6f3a2d9e871
+Revises: e41a9b7c3d58
+Create Date: 2026-10-18 21:02:41.509327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6f3a2d9e871'
+down_revision = 'e41a9b7c3d58'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.create_index('ix_Venue_genres', ['genres'], unique=False, postgresql_using='gin')
+
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.create_index('ix_Artist_genres', ['genres'], unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    with op.batch_alter_table('Artist', schema=None) as batch_op:
+        batch_op.drop_index('ix_Artist_genres', postgresql_using='gin')
+
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.drop_index('ix_Venue_genres', postgresql_using='gin')
@@ -0,0 +1,36 @@
+"""updated_at and versions
+
+Revision ID: c27b84e05d13
+Revises: a93e61d4c2f7
+Create Date: 2026-10-18 13:41:52.902377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27b84e05d13'
+down_revision = 'a93e61d4c2f7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('Version',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    for table in ('Venue', 'Artist', 'Show'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False))
+        op.execute(sa.text('INSERT INTO "Version" (name, updated_at) VALUES (:name, now())').bindparams(name=table))
+
+
+def downgrade():
+    for table in ('Show', 'Artist', 'Venue'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
+
+    op.drop_table('Version')
@@ -0,0 +1,35 @@
+"""Venue area index
+
+Revision ID: d3a7c1e5f964
+Revises: b6f3a2d9e871
+Create Date: 2026-10-18 21:24:13.872095
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3a7c1e5f964'
+down_revision = 'b6f3a2d9e871'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # the forms always required these, rows loaded around them get ''
+    for column in ('name', 'city', 'state'):
+        op.execute(f'UPDATE "Venue" SET {column} = \'\' WHERE {column} IS NULL')
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.alter_column('name', existing_type=sa.String(), nullable=False)
+        batch_op.alter_column('city', existing_type=sa.String(length=120), nullable=False)
+        batch_op.alter_column('state', existing_type=sa.String(length=120), nullable=False)
+        batch_op.create_index('ix_Venue_state_city_name_id', ['state', 'city', 'name', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('Venue', schema=None) as batch_op:
+        batch_op.drop_index('ix_Venue_state_city_name_id')
+        batch_op.alter_column('state', existing_type=sa.String(length=120), nullable=True)
+        batch_op.alter_column('city', existing_type=sa.String(length=120), nullable=True)
+        batch_op.alter_column('name', existing_type=sa.String(), nullable=True)
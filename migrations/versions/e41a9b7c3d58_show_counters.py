@@ -0,0 +1,44 @@
+"""show counters
+
+Revision ID: e41a9b7c3d58
+Revises: c27b84e05d13
+Create Date: 2026-10-18 16:05:33.118420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e41a9b7c3d58'
+down_revision = 'c27b84e05d13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('Venue', 'Artist'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('upcoming_shows_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('past_shows_count', sa.Integer(), server_default='0', nullable=False))
+
+    # backfill against the watermark the rollover job starts from
+    op.execute("INSERT INTO \"Version\" (name, updated_at) VALUES ('rollover', now())")
+    for table, key in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.execute(
+            f'UPDATE "{table}" SET '
+            f'upcoming_shows_count = c.upcoming, past_shows_count = c.past '
+            f'FROM (SELECT {key} AS id, '
+            f'count(*) FILTER (WHERE start_time > now()) AS upcoming, '
+            f'count(*) FILTER (WHERE start_time <= now()) AS past '
+            f'FROM "Show" GROUP BY {key}) AS c '
+            f'WHERE "{table}".id = c.id'
+        )
+
+
+def downgrade():
+    op.execute("DELETE FROM \"Version\" WHERE name = 'rollover'")
+    for table in ('Artist', 'Venue'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('past_shows_count')
+            batch_op.drop_column('upcoming_shows_count')
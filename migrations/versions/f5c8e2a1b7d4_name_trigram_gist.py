@@ -0,0 +1,31 @@
+"""Name trigram indexes as GiST
+
+Revision ID: f5c8e2a1b7d4
+Revises: d3a7c1e5f964
+Create Date: 2026-10-19 10:12:41.508327
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c8e2a1b7d4'
+down_revision = 'd3a7c1e5f964'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # GiST also answers ORDER BY name <-> term, so search stops sorting every match
+    for table in ('Venue', 'Artist'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_name_trgm', postgresql_using='gin')
+            batch_op.create_index(f'ix_{table}_name_trgm', ['name'], unique=False, postgresql_using='gist', postgresql_ops={'name': 'gist_trgm_ops'})
+
+
+def downgrade():
+    for table in ('Artist', 'Venue'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index(f'ix_{table}_name_trgm', postgresql_using='gist')
+            batch_op.create_index(f'ix_{table}_name_trgm', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
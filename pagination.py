@@ -0,0 +1,44 @@
+import base64
+import json
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+
+def encode_cursor(values):
+    raw = json.dumps(
+        [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, columns):
+    """Turn a cursor back into values for ``columns``; ValueError if invalid."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        return [
+            datetime.fromisoformat(value)
+            if column.type.python_type is datetime
+            else column.type.python_type(value)
+            for column, value in zip(columns, values)
+        ]
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def keyset_page(query, columns, cursor, per_page):
+    """Return one page of ``query`` ordered by ``columns`` and the next cursor.
+
+    The cursor holds the last row's ``columns`` values, so every page is an
+    index seek no matter how deep into the result it is.
+    """
+    if cursor:
+        query = query.filter(tuple_(*columns) > tuple(decode_cursor(cursor, columns)))
+    rows = query.order_by(*columns).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows, next_cursor
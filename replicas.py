@@ -0,0 +1,60 @@
+import random
+import time
+
+from flask import g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+# session key holding the time until which the client reads from the primary
+READ_PRIMARY_UNTIL = "_read_primary_until"
+
+
+class RoutingSession(Session):
+    """Read from the replica chosen for the request, write to the primary.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary and
+    mark the request as a write, which opens the client's read-your-writes
+    window in :func:`init_app`.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or getattr(clause, "is_dml", False):
+                g.db_wrote = True
+            elif g.get("db_replica"):
+                return self._db.engines[g.db_replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def reads_primary(view):
+    """Keep a GET view on the primary, e.g. forms that edit the current row."""
+    view.reads_primary = True
+    return view
+
+
+def init_app(app):
+    """Pin each GET/HEAD request to one of the ``replica*`` binds.
+
+    A client that wrote within ``READ_YOUR_WRITES_SECONDS`` keeps reading from
+    the primary so the page it is redirected to shows its own change.
+    """
+    replicas = sorted(
+        key for key in app.config.get("SQLALCHEMY_BINDS", {}) if key.startswith("replica")
+    )
+    window = app.config["READ_YOUR_WRITES_SECONDS"]
+
+    @app.before_request
+    def choose_bind():
+        if not replicas or request.method not in ("GET", "HEAD"):
+            return
+        view = app.view_functions.get(request.endpoint)
+        if getattr(view, "reads_primary", False):
+            return
+        if session.get(READ_PRIMARY_UNTIL, 0) > time.time():
+            return
+        g.db_replica = random.choice(replicas)
+
+    @app.after_request
+    def open_window(response):
+        if g.get("db_wrote"):
+            session[READ_PRIMARY_UNTIL] = time.time() + window
+        return response
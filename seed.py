@@ -0,0 +1,118 @@
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, text
+
+import counters
+from artist import Artist
+from base import db
+from forms import VenueForm
+from show import Show
+from venue import Venue
+from version import Version
+
+GENRES = [value for value, _ in VenueForm.genres.kwargs["choices"]]
+STATES = [value for value, _ in VenueForm.state.kwargs["choices"]]
+WORDS = (
+    "Blue Red Golden Silver Velvet Electric Midnight Wild Lucky Royal Rusty "
+    "Hollow Neon Crimson Broken Gentle Howling Paper Iron Sunset"
+).split()
+NOUNS = (
+    "Hop Room Lounge Hall Garden Cellar Tavern Club Barn Stage Saloon Den "
+    "Owls Foxes Riders Kings Sisters Echoes Tigers Ghosts"
+).split()
+
+
+def skewed(rng, items, skew):
+    # a few items get most of the picks, like real venue/artist popularity
+    return items[int(len(items) * rng.random() ** skew)]
+
+
+def _rows(rng, count, make, batch_size):
+    batch = []
+    for index in range(count):
+        batch.append(make(rng, index))
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(model, batches, progress):
+    inserted = 0
+    for batch in batches:
+        db.session.execute(insert(model), batch)
+        db.session.commit()
+        inserted += len(batch)
+        if progress:
+            progress(model.__tablename__, inserted)
+
+
+def _areas(rng, count):
+    # a handful of big cities hold most of the venues
+    return [(f"City {index}", rng.choice(STATES)) for index in range(count)]
+
+
+def seed(venues, artists, shows, random_seed=42, skew=3.0, batch_size=10000, progress=None):
+    """Insert synthetic venues, artists and shows with skewed popularity."""
+    rng = random.Random(random_seed)
+    areas = _areas(rng, max(1, venues // 50))
+
+    def venue(rng, index):
+        city, state = skewed(rng, areas, skew)
+        return {
+            "name": f"{rng.choice(WORDS)} {rng.choice(NOUNS)} {index}",
+            "city": city,
+            "state": state,
+            "address": f"{rng.randint(1, 9999)} Main Street",
+            "phone": f"{rng.randint(200, 999)}-555-{rng.randint(1000, 9999)}",
+            "genres": rng.sample(GENRES, rng.randint(1, 3)),
+            "image_link": f"https://images.example.com/venues/{index}.jpg",
+            "facebook_link": f"https://www.facebook.com/venue{index}",
+            "website_link": f"https://venue{index}.example.com",
+            "seeking_talent": rng.random() < 0.3,
+            "seeking_description": "",
+        }
+
+    def artist(rng, index):
+        city, state = skewed(rng, areas, skew)
+        return {
+            "name": f"The {rng.choice(WORDS)} {rng.choice(NOUNS)} {index}",
+            "city": city,
+            "state": state,
+            "phone": f"{rng.randint(200, 999)}-555-{rng.randint(1000, 9999)}",
+            "genres": rng.sample(GENRES, rng.randint(1, 3)),
+            "image_link": f"https://images.example.com/artists/{index}.jpg",
+            "facebook_link": f"https://www.facebook.com/artist{index}",
+            "website_link": f"https://artist{index}.example.com",
+            "seeking_venue": rng.random() < 0.3,
+            "seeking_description": "",
+        }
+
+    _insert(Venue, _rows(rng, venues, venue, batch_size), progress)
+    _insert(Artist, _rows(rng, artists, artist, batch_size), progress)
+
+    venue_ids = [row[0] for row in db.session.query(Venue.id).order_by(Venue.id)]
+    artist_ids = [row[0] for row in db.session.query(Artist.id).order_by(Artist.id)]
+    now = datetime.now().replace(second=0, microsecond=0)
+    # two years of history, one year of upcoming shows
+    span = int(timedelta(days=3 * 365).total_seconds() // 60)
+    first = now - timedelta(days=2 * 365)
+
+    def show(rng, index):
+        return {
+            "venue_id": skewed(rng, venue_ids, skew),
+            "artist_id": skewed(rng, artist_ids, skew),
+            "start_time": first + timedelta(minutes=rng.randrange(span)),
+        }
+
+    if venue_ids and artist_ids:
+        _insert(Show, _rows(rng, shows, show, batch_size), progress)
+
+    counters.recount()
+    Version.bump("Venue", "Artist", "Show")
+    db.session.commit()
+    for table in ("Venue", "Artist", "Show"):
+        db.session.execute(text(f'ANALYZE "{table}"'))
+    db.session.commit()
@@ -1,3 +1,5 @@
+from sqlalchemy import func
+
 from base import db
 
 from artist import Artist
@@ -11,6 +13,18 @@ class Show(db.Model):
     start_time = db.Column(db.DateTime, nullable=False)
     venue_id = db.Column(db.Integer, db.ForeignKey("Venue.id"), nullable=False)
     artist_id = db.Column(db.Integer, db.ForeignKey("Artist.id"), nullable=False)
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+    )
+
+    __table_args__ = (
+        db.Index("ix_Show_venue_id_start_time", "venue_id", "start_time"),
+        db.Index("ix_Show_artist_id_start_time", "artist_id", "start_time"),
+        db.Index("ix_Show_start_time_id", "start_time", "id"),
+    )
 
     def _repr__(self):
         return f"<Show {self.venue_id} {self.artist_id} {self.start_time}>"
@@ -27,3 +41,47 @@ class Show(db.Model):
             "artist_image_link": artist.image_link,
             "start_time": self.start_time.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
         }
+
+    @classmethod
+    def for_detail(cls, model, entity_id, current_time):
+        # model row LEFT JOINed with its shows; counts are window aggregates
+        if model is Venue:
+            other, own_key, other_key = Artist, cls.venue_id, cls.artist_id
+        else:
+            other, own_key, other_key = Venue, cls.artist_id, cls.venue_id
+        is_past = cls.start_time < current_time
+        return (
+            db.session.query(
+                model,
+                cls.start_time,
+                is_past.label("is_past"),
+                other.id.label("other_id"),
+                other.name.label("other_name"),
+                other.image_link.label("other_image_link"),
+                func.count(cls.id).filter(is_past).over().label("past_shows_count"),
+                func.count(cls.id)
+                .filter(cls.start_time >= current_time)
+                .over()
+                .label("upcoming_shows_count"),
+            )
+            .outerjoin(cls, own_key == model.id)
+            .outerjoin(other, other_key == other.id)
+            .filter(model.id == entity_id)
+            .order_by(cls.start_time)
+        )
+
+    @classmethod
+    def listing(cls):
+        return (
+            db.session.query(
+                cls.id,
+                cls.start_time,
+                cls.venue_id,
+                Venue.name.label("venue_name"),
+                cls.artist_id,
+                Artist.name.label("artist_name"),
+                Artist.image_link.label("artist_image_link"),
+            )
+            .join(Venue, cls.venue_id == Venue.id)
+            .join(Artist, cls.artist_id == Artist.id)
+        )
@@ -0,0 +1,93 @@
+"""Fixtures for the tests that need PostgreSQL.
+
+Point ``TEST_DATABASE_URL`` at an empty scratch database, and
+``TEST_REPLICA_URL`` at a second one for the replica routing tests; both
+are dropped and recreated from the models. Run from the repository root:
+
+    TEST_DATABASE_URL=postgresql://postgres:1@localhost:5432/fyyur_test \\
+    TEST_REPLICA_URL=postgresql://postgres:1@localhost:5432/fyyur_test_replica \\
+    python -m pytest
+"""
+import os
+import time
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+from base import db
+from counters import ROLLOVER
+from replicas import READ_PRIMARY_UNTIL
+
+# app.py reads its configuration when it is imported, so it is imported by
+# the fixtures once the test databases are in the environment
+if os.environ.get("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+    os.environ["ASYNC_DATABASE_URL"] = (
+        make_url(os.environ["TEST_DATABASE_URL"])
+        .set(drivername="postgresql+asyncpg")
+        .render_as_string(hide_password=False)
+    )
+if os.environ.get("TEST_REPLICA_URL"):
+    os.environ["DATABASE_REPLICA_URLS"] = os.environ["TEST_REPLICA_URL"]
+
+TABLES = '"Show", "Venue", "Artist", "Version"'
+
+
+@pytest.fixture(scope="session")
+def app():
+    if not os.environ.get("TEST_DATABASE_URL"):
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from app import app as fyyur
+
+    with fyyur.app_context():
+        try:
+            for engine in db.engines.values():
+                with engine.begin() as connection:
+                    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                db.metadata.drop_all(engine)
+                db.metadata.create_all(engine)
+        except OperationalError as e:
+            pytest.skip(f"test database is not reachable: {e.orig}")
+    return fyyur
+
+
+@pytest.fixture
+def clear_caches(app):
+    """Drop every in-process cache, so the next request reads the database."""
+
+    def clear():
+        app.extensions["detail_cache"].clear()
+        app.extensions["facet_cache"].clear()
+        app.jinja_env.fragment_cache.clear()
+
+    return clear
+
+
+@pytest.fixture
+def database(app, clear_caches):
+    """Empty every table of every database and the in-process caches."""
+    with app.app_context():
+        for engine in db.engines.values():
+            with engine.begin() as connection:
+                connection.execute(text(f"TRUNCATE {TABLES} RESTART IDENTITY CASCADE"))
+                # the counters' watermark, as inserted by its migration
+                connection.execute(
+                    text('INSERT INTO "Version" (name, updated_at) VALUES (:name, now())'),
+                    {"name": ROLLOVER},
+                )
+    clear_caches()
+    yield app
+    with app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(database):
+    """A client that reads from the primary, where the tests write."""
+    client = database.test_client()
+    # the read-your-writes window keeps it off the replicas
+    with client.session_transaction() as session:
+        session[READ_PRIMARY_UNTIL] = time.time() + 3600
+    return client
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+from base import db
+from venue import Venue
+
+pytest.importorskip("asgiref")
+pytest.importorskip("asyncpg")
+
+
+async def get(application, path, headers=()):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), *headers],
+    }
+    await application(scope, receive, send)
+    start, body = messages[0], b"".join(m.get("body", b"") for m in messages[1:])
+    return start["status"], dict(start["headers"]), body
+
+
+def test_venue_page_renders_through_the_async_path(database):
+    with database.app_context():
+        venue = Venue(name="The Musical Hop", city="San Francisco", state="CA", genres=["Jazz"])
+        db.session.add(venue)
+        db.session.commit()
+        venue_id = venue.id
+
+    import asgi
+
+    async def scenario():
+        try:
+            first = await get(asgi.application, f"/venues/{venue_id}")
+            # served from the detail cache the first request filled
+            etag = first[1][b"etag"]
+            second = await get(asgi.application, f"/venues/{venue_id}")
+            revalidated = await get(
+                asgi.application, f"/venues/{venue_id}", [(b"if-none-match", etag)]
+            )
+            return first, second, revalidated
+        finally:
+            await asgi.engine.dispose()
+
+    first, second, revalidated = asyncio.run(scenario())
+    assert first[0] == 200
+    assert b"The Musical Hop" in first[2]
+    assert second[0] == 200
+    assert second[2] == first[2]
+    assert revalidated[0] == 304
@@ -0,0 +1,87 @@
+import os
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event, insert
+from sqlalchemy.engine import Engine
+
+from artist import Artist
+from base import db
+from replicas import READ_PRIMARY_UNTIL
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("TEST_REPLICA_URL"), reason="TEST_REPLICA_URL is not set"
+)
+
+FORM = {
+    "name": "Renamed Hop",
+    "city": "San Francisco",
+    "state": "CA",
+    "phone": "415-555-0100",
+    "genres": "Jazz",
+    "image_link": "",
+    "facebook_link": "https://www.facebook.com/renamedhop",
+    "website_link": "",
+    "seeking_description": "",
+}
+
+
+@contextmanager
+def engines_used():
+    used = set()
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        used.add(conn.engine)
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield used
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_reads_follow_the_replica_until_the_client_writes(database):
+    # the same artist under a different name on each side tells them apart
+    with database.app_context():
+        primary, replica = db.engines[None], db.engines["replica0"]
+        for engine, name in ((primary, "Primary Hop"), (replica, "Replica Hop")):
+            with engine.begin() as connection:
+                connection.execute(
+                    insert(Artist),
+                    {
+                        "id": 1,
+                        "name": name,
+                        "city": "San Francisco",
+                        "state": "CA",
+                        "genres": ["Jazz"],
+                    },
+                )
+    client = database.test_client()
+
+    with engines_used() as used:
+        response = client.get("/artists/1")
+    assert b"Replica Hop" in response.data
+    assert used == {replica}
+
+    with engines_used() as used:
+        response = client.post("/artists/1/edit", data=FORM)
+    assert response.status_code == 302
+    assert used == {primary}
+    with client.session_transaction() as session:
+        window = session[READ_PRIMARY_UNTIL] - time.time()
+    assert 0 < window <= database.config["READ_YOUR_WRITES_SECONDS"]
+
+    # the redirect lands within READ_YOUR_WRITES_SECONDS, so on the primary
+    with engines_used() as used:
+        response = client.get(response.headers["Location"])
+    assert b"Renamed Hop" in response.data
+    assert used == {primary}
+
+    # once the window has passed the client is back on the replica
+    with client.session_transaction() as session:
+        session[READ_PRIMARY_UNTIL] = time.time() - 1
+    with engines_used() as used:
+        response = client.get("/artists/1")
+    assert b"Replica Hop" in response.data
+    assert used == {replica}
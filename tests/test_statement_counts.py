@@ -0,0 +1,55 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from base import db
+from seed import seed
+
+
+@contextmanager
+def statements():
+    issued = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        issued.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield issued
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+
+def count(client, method, path, **kwargs):
+    with statements() as issued:
+        response = client.open(path, method=method, **kwargs)
+    assert response.status_code == 200
+    return len(issued)
+
+
+REQUESTS = [
+    # validators, the page, genre facets
+    ("GET", "/venues", {}, 3),
+    ("POST", "/venues/search", {"data": {"search_term": "Hop"}}, 1),
+    ("POST", "/artists/search", {"data": {"search_term": "Hop"}}, 1),
+]
+
+
+@pytest.mark.parametrize("method, path, kwargs, expected", REQUESTS)
+def test_statement_count_does_not_grow_with_rows(
+    client, clear_caches, method, path, kwargs, expected
+):
+    with client.application.app_context():
+        seed(venues=20, artists=20, shows=100)
+    # the first request also opens the pool's connection
+    client.open(path, method=method, **kwargs)
+    clear_caches()
+    assert count(client, method, path, **kwargs) == expected
+
+    with client.application.app_context():
+        seed(venues=500, artists=500, shows=5000, random_seed=7)
+        db.session.remove()
+    clear_caches()
+    assert count(client, method, path, **kwargs) == expected
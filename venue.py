@@ -1,3 +1,5 @@
+from sqlalchemy.dialects.postgresql import ARRAY
+
 from base import db
 
 
@@ -5,17 +7,39 @@ class Venue(db.Model):
     __tablename__ = "Venue"
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String)
-    city = db.Column(db.String(120))
-    state = db.Column(db.String(120))
+    # NOT NULL so /venues can keyset-paginate on (state, city, name, id)
+    name = db.Column(db.String, nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
     address = db.Column(db.String(120))
     phone = db.Column(db.String(120))
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
-    genres = db.Column(db.ARRAY(db.String), nullable=False)
+    # postgresql ARRAY for the && / @> operators served by ix_Venue_genres
+    genres = db.Column(ARRAY(db.String), nullable=False)
     website_link = db.Column(db.String(120))
     seeking_talent = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(500))
+    # maintained by counters.py, read by the list pages
+    upcoming_shows_count = db.Column(db.Integer, nullable=False, server_default="0")
+    past_shows_count = db.Column(db.Integer, nullable=False, server_default="0")
+    updated_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        server_default=db.func.now(),
+        onupdate=db.func.now(),
+    )
+
+    __table_args__ = (
+        db.Index(
+            "ix_Venue_name_trgm",
+            "name",
+            postgresql_using="gist",
+            postgresql_ops={"name": "gist_trgm_ops"},
+        ),
+        db.Index("ix_Venue_genres", "genres", postgresql_using="gin"),
+        db.Index("ix_Venue_state_city_name_id", "state", "city", "name", "id"),
+    )
 
     shows = db.relationship("Show", backref="venue", lazy=True)
 
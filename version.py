@@ -0,0 +1,35 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from base import db
+
+
+class Version(db.Model):
+    __tablename__ = "Version"
+
+    # one row per table, bumped by every write that touches it
+    name = db.Column(db.String(50), primary_key=True)
+    updated_at = db.Column(db.DateTime, nullable=False)
+
+    def _repr__(self):
+        return f"<Version {self.name} {self.updated_at}>"
+
+    @classmethod
+    def bump(cls, *names):
+        statement = insert(cls).values(
+            [{"name": name, "updated_at": func.clock_timestamp()} for name in names]
+        )
+        db.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[cls.name],
+                set_={"updated_at": statement.excluded.updated_at},
+            )
+        )
+
+    @classmethod
+    def of(cls, *names):
+        # one column per table, compared as a set of validators
+        return [
+            select(cls.updated_at).where(cls.name == name).scalar_subquery()
+            for name in names
+        ]